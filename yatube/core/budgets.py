@@ -0,0 +1,19 @@
+def query_budget(queries):
+    """
+    Объявляет бюджет SQL-запросов представления: сколько запросов
+    оно может выполнить за один запрос пользователя при любом объеме
+    данных. Бюджеты проверяет core/tests/test_query_budgets.py.
+    """
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+def get_query_budget(view):
+    """Бюджет представления или None, если он не объявлен."""
+    budget = getattr(view, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view, 'view_class', None),
+                         'query_budget', None)
+    return budget
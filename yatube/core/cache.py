@@ -0,0 +1,257 @@
+"""Кэш в файле SQLite, общий для всех процессов одного сервера."""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed_idx ON cache (accessed);
+"""
+# Сколько секунд запись ждет освобождения базы другим процессом.
+BUSY_TIMEOUT = 30
+# Время последнего чтения обновляется не чаще, чем раз в столько
+# секунд: иначе каждое чтение было бы записью и ждало блокировки.
+ACCESS_RESOLUTION = 1.0
+# Проверять размер кэша раз в столько записей процесса.
+CULL_EVERY = 100
+
+
+class SQLiteCache(BaseCache):
+    """
+    Замена LocMemCache, общая для воркеров: LOCATION - путь к файлу
+    базы в режиме WAL, чтения не ждут записей. При превышении
+    MAX_ENTRIES удаляются истекшие записи и 1/CULL_FREQUENCY давно
+    не читавшихся (LRU).
+
+        CACHES = {'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+        }}
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        # Соединение свое у каждого потока и процесса: после fork
+        # унаследованное соединение использовать нельзя.
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _write(self):
+        """Транзакция записи: BEGIN IMMEDIATE сразу берет блокировку."""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _dumps(self, value):
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        rows = self._connection().execute(
+            f'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({", ".join("?" * len(keys))})',
+            list(keys),
+        ).fetchall()
+        found, touched = {}, []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            found[keys[key]] = pickle.loads(value)
+            if accessed < now - ACCESS_RESOLUTION:
+                touched.append(key)
+        if touched:
+            self._touch_accessed(touched, now)
+        return found
+
+    def _touch_accessed(self, keys, now):
+        """Отметка LRU не обязательна: при занятой базе она пропускается."""
+        connection = self._connection()
+        connection.execute('PRAGMA busy_timeout = 0')
+        try:
+            with self._write() as connection:
+                connection.executemany(
+                    'UPDATE cache SET accessed = ? WHERE key = ?',
+                    [(now, key) for key in keys],
+                )
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT * 1000}')
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = [
+            (self._key(key, version), self._dumps(value), expires, now)
+            for key, value in data.items()
+        ]
+        with self._write() as connection:
+            connection.executemany(
+                'REPLACE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)', rows
+            )
+        self._written(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as connection:
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, now),
+            )
+            added = connection.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)',
+                (key, self._dumps(value), self.get_backend_timeout(timeout),
+                 now),
+            ).rowcount
+        self._written(added)
+        return bool(added)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._write() as connection:
+            return bool(connection.execute(
+                'UPDATE cache SET expires = ? '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), self._key(key, version),
+                 time.time()),
+            ).rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарно для всех процессов: чтение и запись в одной транзакции."""
+        key = self._key(key, version)
+        with self._write() as connection:
+            row = connection.execute(
+                'SELECT value FROM cache '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (self._dumps(value), key),
+            )
+        return value
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            with self._write() as connection:
+                connection.executemany(
+                    'DELETE FROM cache WHERE key = ?',
+                    [(key,) for key in keys],
+                )
+
+    def has_key(self, key, version=None):
+        return self._connection().execute(
+            'SELECT 1 FROM cache '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        with self._write() as connection:
+            connection.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение переиспользуется между запросами.
+        pass
+
+    def _written(self, count):
+        self._writes += count
+        if self._writes >= CULL_EVERY:
+            self._writes = 0
+            self._cull()
+
+    def _cull(self):
+        with self._write() as connection:
+            connection.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+            )
+            total, = connection.execute(
+                'SELECT COUNT(*) FROM cache'
+            ).fetchone()
+            if total <= self._max_entries:
+                return
+            connection.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (max(total // self._cull_frequency,
+                     total - self._max_entries),),
+            )
+
+
+def is_shared(backend=None):
+    """Записи кэша видят все процессы, а не только записавший."""
+    if backend is None:
+        backend = caches[DEFAULT_CACHE_ALIAS]
+    return not isinstance(backend, LocMemCache)
+
+
+def shared_timeout(timeout, backend=None):
+    """
+    Срок жизни значения, которое сбрасывается при изменении данных.
+    В кэше процесса сброс виден только ему, поэтому срок ограничен
+    LOCAL_CACHE_TIMEOUT: остальные процессы покажут старое значение
+    не дольше этого.
+    """
+    if is_shared(backend):
+        return timeout
+    return min(timeout, settings.LOCAL_CACHE_TIMEOUT)
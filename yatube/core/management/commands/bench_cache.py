@@ -0,0 +1,79 @@
+import os
+import random
+import tempfile
+import time
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    'LocMemCache': 'django.core.cache.backends.locmem.LocMemCache',
+    'SQLiteCache': 'core.cache.SQLiteCache',
+}
+
+
+def workload(backend, location, seed, ops, keys, size):
+    """
+    Чтение со сквозной записью, как у кэша страниц: промах кладет
+    значение в кэш, каждая двадцатая операция - сброс ключа.
+    Возвращает (попадания, чтения, секунды).
+    """
+    cache = import_string(backend)(location, {
+        'TIMEOUT': 300, 'OPTIONS': {'MAX_ENTRIES': keys * 2},
+    })
+    rnd = random.Random(seed)
+    payload = 'x' * size
+    hits = reads = 0
+    started = time.perf_counter()
+    for _ in range(ops):
+        # Популярные ключи читаются чаще остальных.
+        key = f'bench:{int(keys * rnd.random() ** 2)}'
+        if rnd.random() < 0.05:
+            cache.delete(key)
+            continue
+        reads += 1
+        if cache.get(key) is None:
+            cache.set(key, payload)
+        else:
+            hits += 1
+    return hits, reads, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает LocMemCache и SQLiteCache при одновременной работе '
+        'нескольких процессов: пропускную способность и долю попаданий'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count())
+        parser.add_argument('--ops', type=int, default=5000)
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument('--size', type=int, default=4096)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        processes = max(options['processes'] or 1, 1)
+        with tempfile.TemporaryDirectory() as directory:
+            locations = {
+                'LocMemCache': 'bench',
+                'SQLiteCache': os.path.join(directory, 'cache.sqlite3'),
+            }
+            for name, backend in BACKENDS.items():
+                tasks = [
+                    (backend, locations[name], options['seed'] + number,
+                     options['ops'], options['keys'], options['size'])
+                    for number in range(processes)
+                ]
+                with Pool(processes) as pool:
+                    results = pool.starmap(workload, tasks)
+                hits = sum(result[0] for result in results)
+                reads = sum(result[1] for result in results)
+                elapsed = max(result[2] for result in results)
+                total = options['ops'] * processes
+                self.stdout.write(
+                    f'{name:12} процессов: {processes}, '
+                    f'{total / elapsed:8.0f} операций/с, '
+                    f'попаданий: {hits / reads:.0%}'
+                )
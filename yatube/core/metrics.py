@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import suppress
+from glob import glob
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+BADWORDS_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+# Имя: (тип, описание, границы корзин гистограммы)
+METRICS = {
+    'yatube_requests_total': (
+        'counter', 'Обработанные запросы', None),
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время обработки запроса', LATENCY_BUCKETS),
+    'yatube_request_queries': (
+        'histogram', 'SQL-запросов на один запрос', QUERY_BUCKETS),
+    'yatube_request_sql_seconds': (
+        'histogram', 'Время SQL на один запрос', LATENCY_BUCKETS),
+    'yatube_page_cache_total': (
+        'counter', 'Обращения к кэшу страниц', None),
+    'yatube_page_cache_revalidation_errors_total': (
+        'counter', 'Ошибки пересборки страниц после ответа', None),
+    'yatube_cache_rebuilds_avoided_total': (
+        'counter', 'Промахи кэша, обслуженные без повторной сборки', None),
+    'yatube_badwords_check_seconds': (
+        'histogram', 'Время проверки текста FilterBadWords', BADWORDS_BUCKETS),
+}
+
+
+class Registry:
+    """
+    Счетчики и гистограммы процесса. Если задан METRICS_DIR, снимок
+    периодически пишется в файл <pid>.json этого каталога, а /metrics
+    суммирует файлы всех живых процессов, поэтому ответ не зависит от
+    того, какой воркер принял запрос. Файлы завершившихся процессов
+    удаляются.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._flushed_at = 0.0
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            # Корзины без накопления, затем сумма и число наблюдений.
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(buckets) + 3)
+            state[bisect_left(buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                [name, list(labels), value]
+                for (name, labels), value in self._values.items()
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def flush(self, force=False):
+        """Записывает снимок процесса в METRICS_DIR не чаще раза в секунду."""
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or (not force and now - self._flushed_at < 1):
+            return
+        self._flushed_at = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """Снимки всех процессов, сложенные по имени и меткам."""
+        if not settings.METRICS_DIR:
+            return merge([self.snapshot()])
+        self.flush(force=True)
+        snapshots = []
+        for path in glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            pid = os.path.basename(path)[:-len('.json')]
+            if pid.isdigit() and not is_alive(int(pid)):
+                # Счетчики завершившегося воркера больше не суммируются.
+                with suppress(OSError):
+                    os.remove(path)
+                continue
+            try:
+                with open(path) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return merge(snapshots)
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            current = merged.get(key)
+            if current is None:
+                merged[key] = list(value) if isinstance(value, list) else value
+            elif isinstance(value, list):
+                merged[key] = [a + b for a, b in zip(current, value)]
+            else:
+                merged[key] = current + value
+    return merged
+
+
+def escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{escape(value)}"' for key, value in labels)
+    return f'{{{pairs}}}'
+
+
+def to_text(values):
+    """Текстовый формат Prometheus."""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted(
+            (labels, value) for (metric, labels), value in values.items()
+            if metric == name
+        )
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind != 'histogram':
+                lines.append(f'{name}{format_labels(labels)} {value}')
+                continue
+            total = 0
+            for bound, count in zip((*buckets, '+Inf'), value):
+                total += count
+                bucket_labels = format_labels(labels + (('le', bound),))
+                lines.append(f'{name}_bucket{bucket_labels} {total}')
+            lines.append(f'{name}_sum{format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_count{format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def record_request(request, response, metrics):
+    """Учитывает запрос, посчитанный RequestMetricsMiddleware."""
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unresolved'
+    registry.inc('yatube_requests_total', view=view, method=request.method,
+                 status=response.status_code)
+    registry.observe('yatube_request_duration_seconds', metrics.wall_time,
+                     view=view)
+    registry.observe('yatube_request_queries', metrics.queries, view=view)
+    registry.observe('yatube_request_sql_seconds', metrics.sql_time,
+                     view=view)
+    # page_cache отмечает на запросе, откуда взята страница: hit, miss,
+    # stale или waited - копия, которую пересобирает другой процесс,
+    # expired - старая копия до пересборки после ответа, error - копия
+    # вместо страницы, сборка которой упала с ошибкой базы.
+    result = getattr(request, 'page_cache', None)
+    if result is not None:
+        registry.inc('yatube_page_cache_total', view=view, result=result)
+    registry.flush()
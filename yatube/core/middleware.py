@@ -0,0 +1,128 @@
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+from .metrics import record_request
+
+logger = logging.getLogger('yatube.requests')
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Счетчики одного запроса: SQL, шаблоны и общее время."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.wall_time = 0.0
+        self.template_depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        """Обертка connection.execute_wrapper: время каждого запроса."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+    def as_dict(self, request, response):
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'wall_ms': round(self.wall_time * 1000, 2),
+        }
+
+
+def current_metrics():
+    """Счетчики запроса, который обрабатывается в этом потоке."""
+    return getattr(_local, 'metrics', None)
+
+
+def instrument_templates():
+    """
+    Один раз оборачивает Template.render. Время считается только для
+    внешнего шаблона, чтобы include не учитывались дважды; запросы
+    ленивых QuerySet внутри шаблона входят и в SQL, и в шаблоны.
+    """
+    render = Template.render
+    if getattr(render, 'instrumented', False):
+        return
+
+    def timed_render(self, context):
+        metrics = current_metrics()
+        if metrics is None or metrics.template_depth:
+            return render(self, context)
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+            metrics.template_depth -= 1
+
+    timed_render.instrumented = True
+    Template.render = timed_render
+
+
+class RequestMetricsMiddleware:
+    """
+    Считает для каждого запроса число SQL-запросов, время SQL,
+    время рендеринга шаблонов и общее время. Медленные запросы
+    пишутся в лог всегда, остальные - с вероятностью
+    REQUEST_METRICS_SAMPLE_RATE. При REQUEST_METRICS_HEADER те же
+    данные отдаются в заголовке Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_templates()
+
+    def __call__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        _local.metrics = metrics
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        metrics.wall_time = time.perf_counter() - started
+        record_request(request, response, metrics)
+        self.report(request, response, metrics)
+        return response
+
+    @staticmethod
+    def report(request, response, metrics):
+        slow = metrics.wall_time * 1000 >= settings.REQUEST_METRICS_SLOW_MS
+        sampled = random.random() < settings.REQUEST_METRICS_SAMPLE_RATE
+        if slow or sampled:
+            logger.log(
+                logging.WARNING if slow else logging.INFO,
+                json.dumps(metrics.as_dict(request, response)),
+            )
+        if settings.REQUEST_METRICS_HEADER:
+            response['Server-Timing'] = (
+                f'db;dur={metrics.sql_time * 1000:.1f};'
+                f'desc="{metrics.queries} queries", '
+                f'tpl;dur={metrics.template_time * 1000:.1f}, '
+                f'total;dur={metrics.wall_time * 1000:.1f}'
+            )
@@ -0,0 +1,286 @@
+import hashlib
+import json
+import logging
+import re
+import secrets
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.models import AnonymousUser
+from django.db import DatabaseError, transaction
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from .cache import shared_timeout
+from .metrics import registry
+from .singleflight import acquire, avoided, release, wait_for
+
+logger = logging.getLogger('yatube.pagecache')
+
+TAG_KEY = 'page:tag:{}'
+# Тег, который есть у каждой страницы.
+ALL_PAGES = 'all'
+
+# Имя дыры: (шаблон, функция, строящая контексты для списка параметров)
+HOLES = {}
+
+
+def hole(name, template):
+    """
+    Регистрирует дыру - фрагмент страницы, зависящий от пользователя.
+    prepare(request, params) получает параметры всех таких дыр страницы
+    и возвращает по контексту на каждую, так что данные пользователя
+    загружаются одним запросом на страницу.
+    """
+    def register(prepare):
+        HOLES[name] = (template, prepare)
+        return prepare
+    return register
+
+
+@hole('header', 'includes/header.html')
+def without_params(request, params):
+    return [{} for _ in params]
+
+
+def is_shared_render(request):
+    """Страница рисуется для кэша: данные пользователя не нужны."""
+    return getattr(request, 'page_cache_nonce', None) is not None
+
+
+def skip_page_cache(request):
+    """Запрещает кэшировать страницу, видимую только этому пользователю."""
+    request.page_cache_nonce = None
+
+
+def marker(nonce, name, params):
+    # '>' экранируется, чтобы параметры не закрыли комментарий.
+    data = json.dumps(params, sort_keys=True).replace('>', '\\u003e')
+    return f'<!--hole:{nonce}:{name}:{data}-->'
+
+
+def fill_holes(content, nonce, request):
+    """Заменяет метки дыр фрагментами для текущего пользователя."""
+    pattern = re.compile(rf'<!--hole:{nonce}:(\w+):(.*?)-->')
+    found = {}
+    for match in pattern.finditer(content):
+        found.setdefault(match[1], []).append(json.loads(match[2]))
+    rendered = {}
+    for name, params in found.items():
+        template, prepare = HOLES[name]
+        rendered[name] = iter([
+            render_to_string(template, context, request)
+            for context in prepare(request, params)
+        ])
+    return pattern.sub(lambda match: next(rendered[match[1]]), content)
+
+
+def forget_pages(*tags):
+    """
+    Делает устаревшими страницы с любым из tags: отметка тега
+    сдвигается на текущее время, и страницы, собранные раньше нее,
+    больше не отдаются. Повтор после коммита не дает запросу,
+    прочитавшему базу до коммита, сохранить старую страницу.
+    """
+    keys = [TAG_KEY.format(tag) for tag in tags]
+
+    def touch():
+        cache.set_many(dict.fromkeys(keys, time.time_ns()), None)
+
+    touch()
+    transaction.on_commit(touch)
+
+
+def tag_page(request, *tags):
+    """Страница зависит от tags: их сброс делает ее устаревшей."""
+    if is_shared_render(request):
+        request.page_cache_tags.update(tags)
+
+
+def remember_tags(tags, started):
+    """
+    Заводит недостающие отметки тегов страницы, собранной в started.
+    Когда тег сбрасывался до этого, неизвестно: отметка ставится
+    перед started, и страницы, собранные раньше, устаревают. Уже
+    существующую отметку add() не перезапишет.
+    """
+    keys = [TAG_KEY.format(tag) for tag in tags]
+    for key in set(keys) - cache.get_many(keys).keys():
+        cache.add(key, started - 1, None)
+
+
+def is_fresh(started, tags):
+    """
+    Страница, собранная в момент started, актуальна, если после
+    него не сбрасывался ни один из ее тегов. Пропавшая отметка
+    означает, что момент сброса неизвестен.
+    """
+    keys = [TAG_KEY.format(tag) for tag in tags]
+    marks = cache.get_many(keys)
+    return len(marks) == len(keys) and max(marks.values()) < started
+
+
+def page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{path}'
+
+
+def serve(request, entry):
+    _, _, nonce, content, content_type = entry
+    response = HttpResponse(content_type=content_type)
+    try:
+        response.content = fill_holes(content, nonce, request)
+    except DatabaseError:
+        # База недоступна: страница показывается как гостю, дыры
+        # которого обходятся без запросов.
+        request.user = AnonymousUser()
+        response.content = fill_holes(content, nonce, request)
+    return response
+
+
+def render_shared(view, request, key, *args, **kwargs):
+    """
+    Рисует страницу без данных пользователя и сохраняет ответ 200.
+    Возвращает ответ, его текст с метками дыр и их nonce; текст
+    None, если страница нарисована для пользователя.
+    """
+    started = time.time_ns()
+    request.page_cache_nonce = secrets.token_hex(8)
+    request.page_cache_tags = {ALL_PAGES}
+    try:
+        response = view(request, *args, **kwargs)
+    finally:
+        nonce = request.page_cache_nonce
+        tags = sorted(request.page_cache_tags)
+        del request.page_cache_nonce, request.page_cache_tags
+    if nonce is None or response.streaming:
+        return response, None, None
+    content = response.content.decode(response.charset)
+    if response.status_code == 200:
+        request.page_cache = 'miss'
+        remember_tags(tags, started)
+        cache.set(key, (started, tags, nonce, content,
+                        response['Content-Type']),
+                  shared_timeout(settings.PAGE_CACHE_TIMEOUT))
+    return response, content, nonce
+
+
+def build(view, request, key, *args, **kwargs):
+    """Собирает и сохраняет страницу, заполняя дыры для пользователя."""
+    response, content, nonce = render_shared(
+        view, request, key, *args, **kwargs
+    )
+    if content is not None:
+        response.content = fill_holes(content, nonce, request)
+    return response
+
+
+def revalidate(view, request, key, args, kwargs):
+    """
+    Пересобирает общую копию страницы. Ответ уже отправлен, поэтому
+    ошибка сборки только записывается в лог и метрики.
+    """
+    if not acquire(key):
+        return
+    try:
+        render_shared(view, request, key, *args, **kwargs)
+    except Exception:
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        logger.exception('Не удалось пересобрать страницу %s',
+                         request.get_full_path())
+        registry.inc('yatube_page_cache_revalidation_errors_total',
+                     view=view_name)
+    finally:
+        release(key)
+
+
+def revalidate_on_close(response, view, request, key, args, kwargs):
+    """
+    Пересобирает страницу после отправки ответа: WSGI-сервер вызывает
+    close() ответа, когда клиент уже получил его.
+    """
+    close = response.close
+
+    def revalidate_and_close():
+        try:
+            revalidate(view, request, key, args, kwargs)
+        finally:
+            close()
+
+    response.close = revalidate_and_close
+
+
+def is_expired(entry):
+    """Копия старше PAGE_CACHE_SOFT_TIMEOUT: пора собрать новую."""
+    age = (time.time_ns() - entry[0]) / 10 ** 9
+    return age >= shared_timeout(settings.PAGE_CACHE_SOFT_TIMEOUT)
+
+
+def serve_and_revalidate(view, request, key, entry, args, kwargs):
+    request.page_cache = 'expired'
+    response = serve(request, entry)
+    revalidate_on_close(response, view, request, key, args, kwargs)
+    return response
+
+
+def build_or_fallback(view, request, key, entry, args, kwargs):
+    """Собирает страницу, а при ошибке базы отдает прежнюю копию."""
+    try:
+        return build(view, request, key, *args, **kwargs)
+    except DatabaseError:
+        if entry is None:
+            raise
+    request.page_cache = 'error'
+    response = serve(request, entry)
+    response['X-Page-Cache'] = 'stale-if-error'
+    return response
+
+
+def page_cache(view):
+    """
+    Кэширует одну общую для всех пользователей версию страницы.
+    Фрагменты, зависящие от пользователя, рисуются на ее месте
+    метками {% hole %} и заполняются заново при каждом запросе.
+    Копия живет до сброса одного из тегов, отмеченных tag_page(),
+    но не дольше PAGE_CACHE_TIMEOUT; 0 отключает кэш. Сброс виден
+    другим процессам, только если кэш общий, поэтому в кэше процесса
+    сроки ограничены LOCAL_CACHE_TIMEOUT.
+
+    Устаревшую страницу собирает заново только один процесс: пока он
+    работает, остальные отдают прежнюю копию, а если ее нет - ждут.
+    Копию старше PAGE_CACHE_SOFT_TIMEOUT отдают сразу и пересобирают
+    после ответа. Если сборка падает с ошибкой базы, отдается прежняя
+    копия с заголовком X-Page-Cache: stale-if-error.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or not settings.PAGE_CACHE_TIMEOUT):
+            return view(request, *args, **kwargs)
+        key = page_key(request)
+        entry = cache.get(key)
+        if entry is not None and is_fresh(entry[0], entry[1]):
+            if not is_expired(entry):
+                request.page_cache = 'hit'
+                return serve(request, entry)
+            return serve_and_revalidate(view, request, key, entry,
+                                        args, kwargs)
+        locked = acquire(key)
+        if not locked:
+            reason = 'stale'
+            if entry is None:
+                reason, entry = 'waited', wait_for(key)
+            if entry is not None:
+                request.page_cache = reason
+                avoided('page', reason)
+                return serve(request, entry)
+        try:
+            return build_or_fallback(view, request, key, entry,
+                                     args, kwargs)
+        finally:
+            if locked:
+                release(key)
+    return wrapper
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import registry
+
+LOCK_KEY = '{}:rebuild'
+POLL_INTERVAL = 0.05
+
+
+def acquire(key):
+    """
+    Право собрать значение key заново. Блокировка хранится в общем
+    кэше, поэтому ее видят все процессы; таймаут освобождает ее, если
+    собиравший процесс упал.
+    """
+    return cache.add(
+        LOCK_KEY.format(key), True, settings.SINGLE_FLIGHT_LOCK_TIMEOUT
+    )
+
+
+def release(key):
+    cache.delete(LOCK_KEY.format(key))
+
+
+def wait_for(key):
+    """
+    Ждет, пока значение key соберет процесс, взявший блокировку.
+    None, если блокировку отпустили без значения или ожидание
+    дольше SINGLE_FLIGHT_WAIT.
+    """
+    lock_key = LOCK_KEY.format(key)
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        found = cache.get_many([key, lock_key])
+        if key in found:
+            return found[key]
+        if lock_key not in found:
+            break
+    return None
+
+
+def avoided(kind, reason):
+    """Учитывает промах, обслуженный без повторной сборки."""
+    registry.inc('yatube_cache_rebuilds_avoided_total', kind=kind,
+                 reason=reason)
+
+
+def get_or_build(key, build, timeout, kind):
+    """
+    cache.get_or_set(), при промахе которого build() выполняет только
+    один процесс, а остальные ждут его результат.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    locked = acquire(key)
+    if not locked:
+        value = wait_for(key)
+        if value is not None:
+            avoided(kind, 'waited')
+            return value
+    try:
+        value = build()
+        cache.set(key, value, timeout)
+    finally:
+        if locked:
+            release(key)
+    return value
@@ -0,0 +1,22 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.pagecache import HOLES, marker
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **params):
+    """
+    Фрагмент, зависящий от пользователя. При отрисовке для кэша
+    страниц выводит метку с params, иначе - шаблон дыры с текущим
+    контекстом, как {% include %}.
+    """
+    request = context.get('request')
+    nonce = getattr(request, 'page_cache_nonce', None)
+    if nonce is not None:
+        return mark_safe(marker(nonce, name, params))
+    return context.template.engine.get_template(
+        HOLES[name][0]
+    ).render(context)
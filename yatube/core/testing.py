@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """manage.py test с кэшем из yatube.test_settings."""
+
+    def setup_test_environment(self, **kwargs):
+        from yatube.test_settings import CACHES
+
+        super().setup_test_environment(**kwargs)
+        self.test_caches = override_settings(CACHES=CACHES)
+        self.test_caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_caches.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+class SQLiteCacheMixin:
+    """Гоняет тесты класса на общем кэше сервера во временном файле."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.TemporaryDirectory()
+        cls.cache_settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'core.cache.SQLiteCache',
+                'LOCATION': os.path.join(cls.cache_dir.name, 'cache.sqlite3'),
+            }
+        })
+        cls.cache_settings.enable()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls.cache_settings.disable()
+            cls.cache_dir.cleanup()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.cache_settings.disable()
+        cls.cache_dir.cleanup()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import time
+from multiprocessing import Pool
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import SQLiteCache, shared_timeout
+
+
+def increment(path, times):
+    cache = SQLiteCache(path, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.path, {})
+
+    def test_basic_operations(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 2))
+        self.assertTrue(self.cache.add('other', 2))
+        self.assertEqual(self.cache.get_many(['key', 'other', 'missing']),
+                         {'key': {'value': 1}, 'other': 2})
+        self.assertEqual(self.cache.incr('other', 3), 5)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.cache.delete_many(['key', 'other'])
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expired_value_is_missing(self):
+        self.cache.set('key', 1, timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 2))
+        self.assertEqual(self.cache.get('key'), 2)
+
+    def test_values_are_shared_between_instances(self):
+        """Второй экземпляр, как другой воркер, видит те же записи."""
+        self.cache.set('key', 'value')
+        self.assertEqual(SQLiteCache(self.path, {}).get('key'), 'value')
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set('counter', 0)
+        with Pool(4) as pool:
+            pool.starmap(increment, [(self.path, 50)] * 4)
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_least_recently_used_are_culled(self):
+        cache = SQLiteCache(self.path, {'OPTIONS': {'MAX_ENTRIES': 10}})
+        cache.set('hot', 'value')
+        for number in range(200):
+            cache.set(f'key:{number}', number)
+            cache._touch_accessed([cache.make_key('hot')], time.time())
+        self.assertEqual(cache.get('hot'), 'value')
+        self.assertIsNone(cache.get('key:0'))
+
+
+@override_settings(LOCAL_CACHE_TIMEOUT=20)
+class SharedTimeoutTest(SimpleTestCase):
+    def test_local_cache_limits_timeout(self):
+        """Сброс в кэше процесса не виден другим: срок короткий."""
+        local = LocMemCache('test', {})
+        self.assertEqual(shared_timeout(60 * 60, local), 20)
+        self.assertEqual(shared_timeout(5, local), 5)
+
+    def test_shared_cache_keeps_timeout(self):
+        with tempfile.TemporaryDirectory() as directory:
+            shared = SQLiteCache(os.path.join(directory, 'cache.sqlite3'), {})
+            self.assertEqual(shared_timeout(60 * 60, shared), 60 * 60)
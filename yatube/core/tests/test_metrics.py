@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import registry
+from posts.forms import FilterBadWords
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+class MetricsEndpointTest(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+        registry.reset()
+        cache.clear()
+
+    def scrape(self):
+        return self.guest_client.get(reverse('metrics')).content.decode()
+
+    def test_requests_and_page_cache_are_counted(self):
+        """Запросы, гистограммы и кэш страниц попадают в /metrics."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        text = self.scrape()
+        self.assertIn(
+            'yatube_requests_total{method="GET",status="200",'
+            'view="posts:index"} 2', text
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 2', text
+        )
+        self.assertIn(
+            'yatube_page_cache_total{result="hit",view="posts:index"} 1',
+            text
+        )
+        self.assertIn(
+            'yatube_page_cache_total{result="miss",view="posts:index"} 1',
+            text
+        )
+
+    def test_badwords_timing(self):
+        """Время проверки FilterBadWords учитывается по исходу кэша."""
+        FilterBadWords().find_bad_words('Текст')
+        self.assertIn('yatube_badwords_check_seconds_count', self.scrape())
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_endpoint_is_restricted(self):
+        """Адреса не из METRICS_ALLOWED_IPS получают 404."""
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_endpoint_is_closed_by_default(self):
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_proxied_request_is_rejected(self):
+        """За прокси REMOTE_ADDR разрешен, но запрос пришел снаружи."""
+        response = self.guest_client.get(
+            reverse('metrics'), HTTP_X_FORWARDED_FOR='203.0.113.5'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_processes_are_aggregated(self):
+        """Метрики других процессов суммируются через METRICS_DIR."""
+        with tempfile.TemporaryDirectory() as directory:
+            other = [['yatube_requests_total',
+                      [['method', 'GET'], ['status', 200],
+                       ['view', 'about:tech']], 5]]
+            with open(os.path.join(directory, f'{os.getppid()}.json'),
+                      'w') as file:
+                json.dump(other, file)
+            with override_settings(METRICS_DIR=directory):
+                self.guest_client.get(reverse('about:tech'))
+                text = self.scrape()
+        self.assertIn(
+            'yatube_requests_total{method="GET",status="200",'
+            'view="about:tech"} 6', text
+        )
+
+    def test_dead_processes_are_pruned(self):
+        """Файл завершившегося воркера удаляется и не суммируется."""
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f'{process.pid}.json')
+            with open(path, 'w') as file:
+                json.dump([['yatube_requests_total',
+                            [['method', 'GET'], ['status', 200],
+                             ['view', 'about:tech']], 5]], file)
+            with override_settings(METRICS_DIR=directory):
+                text = self.scrape()
+            self.assertFalse(os.path.exists(path))
+        self.assertNotIn('view="about:tech"', text)
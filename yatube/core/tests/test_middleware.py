@@ -0,0 +1,48 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(
+            title='Заголовок', text='Текст', author=cls.user
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=0,
+                       REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_slow_request_is_logged(self):
+        """Медленный запрос пишется в лог с именем представления."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        with self.assertLogs('yatube.requests', 'WARNING') as logs:
+            self.guest_client.get(url)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:post_detail')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreaterEqual(record['wall_ms'], record['template_ms'])
+
+    @override_settings(REQUEST_METRICS_SLOW_MS=10 ** 6,
+                       REQUEST_METRICS_SAMPLE_RATE=0,
+                       REQUEST_METRICS_HEADER=True)
+    def test_server_timing_header(self):
+        """Метрики отдаются в заголовке Server-Timing без записи в лог."""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('yatube.requests'):
+                response = self.guest_client.get(reverse('about:tech'))
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertIn('queries', response['Server-Timing'])
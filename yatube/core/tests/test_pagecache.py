@@ -0,0 +1,198 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.pagecache import ALL_PAGES, TAG_KEY, page_key
+from core.testing import SQLiteCacheMixin
+from posts.models import PENDING, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(
+            title='Заголовок', text='Текст', author=cls.author
+        )
+        cls.post.liked.add(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_users_share_one_copy(self):
+        """Копия страницы общая, а лайки и меню - свои у каждого."""
+        url = reverse('posts:index')
+        guest = self.guest_client.get(url).content.decode()
+        self.assertIsNotNone(cache.get(page_key(RequestFactory().get(url))))
+        reader = self.reader_client.get(url).content.decode()
+        self.assertIn('🖤 1', guest)
+        self.assertNotIn('Reader', guest)
+        self.assertIn('🤍 1', reader)
+        self.assertIn('Reader', reader)
+        self.assertIn('csrfmiddlewaretoken', reader)
+
+    def test_hit_skips_view_queries(self):
+        """Гостю страница из кэша отдается без запросов к базе."""
+        url = reverse('posts:profile', args=(self.author.username,))
+        self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(len(queries), 0)
+        self.assertContains(response, 'Заголовок')
+
+    def test_post_actions_only_for_author(self):
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        edit_url = reverse('posts:post_edit', args=(self.post.pk,))
+        self.assertNotContains(self.reader_client.get(url), edit_url)
+        self.assertContains(self.author_client.get(url), edit_url)
+
+    def test_unpublished_post_is_not_cached(self):
+        post = Post.objects.create(
+            title='Черновик', text='Текст', author=self.author,
+            status=PENDING
+        )
+        url = reverse('posts:post_detail', args=(post.pk,))
+        self.assertContains(self.author_client.get(url), 'Черновик')
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
+
+    def test_new_post_forgets_pages(self):
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        Post.objects.create(
+            title='Новый пост', text='Текст', author=self.author
+        )
+        self.assertContains(self.guest_client.get(url), 'Новый пост')
+
+    def assertServedFromCache(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        self.assertEqual(len(queries), 0)
+
+    def test_comment_forgets_only_its_post(self):
+        """Комментарий сбрасывает страницу поста, но не главную."""
+        index_url = reverse('posts:index')
+        post_url = reverse('posts:post_detail', args=(self.post.pk,))
+        self.guest_client.get(index_url)
+        self.guest_client.get(post_url)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Новый комментарий'
+        )
+        self.assertServedFromCache(index_url)
+        self.assertContains(self.guest_client.get(post_url),
+                            'Новый комментарий')
+
+    def test_like_and_follow_forget_pages(self):
+        index_url = reverse('posts:index')
+        profile_url = reverse('posts:profile', args=(self.author.username,))
+        self.guest_client.get(index_url)
+        self.guest_client.get(profile_url)
+        self.post.liked.add(self.author)
+        self.assertContains(self.guest_client.get(index_url), '🖤 2')
+        self.assertContains(self.guest_client.get(profile_url), '🖤 2')
+        self.assertServedFromCache(profile_url)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(self.guest_client.get(profile_url),
+                            'Подписчиков: 1')
+
+    def test_post_moved_to_other_group(self):
+        """Пост пропадает из прежней группы сразу после правки."""
+        group = Group.objects.create(title='Группа', slug='group')
+        post = Post.objects.create(
+            title='В группе', text='Текст', author=self.author, group=group
+        )
+        url = reverse('posts:group_list', args=(group.slug,))
+        self.assertContains(self.guest_client.get(url), 'В группе')
+        post.group = None
+        post.save()
+        self.assertNotContains(self.guest_client.get(url), 'В группе')
+
+    def test_lost_tag_mark_outdates_older_pages(self):
+        """
+        Пропавшая из кэша отметка тега заводится заново моментом
+        сборки, а не нулем: страницы, собранные раньше, устаревают.
+        """
+        index_url = reverse('posts:index')
+        self.guest_client.get(index_url)
+        Post.objects.filter(pk=self.post.pk).update(title='Тихая правка')
+        cache.delete(TAG_KEY.format(ALL_PAGES))
+        self.guest_client.get(
+            reverse('posts:profile', args=(self.author.username,))
+        )
+        self.assertContains(self.guest_client.get(index_url), 'Тихая правка')
+
+    @override_settings(LOCAL_CACHE_TIMEOUT=0)
+    def test_local_cache_keeps_pages_briefly(self):
+        """Кэш процесса не видит сбросов из других процессов."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        self.assertIsNone(cache.get(page_key(RequestFactory().get(url))))
+
+    def test_group_change_forgets_cards_on_other_pages(self):
+        """Новый адрес группы виден в карточках главной и профиля."""
+        group = Group.objects.create(title='Группа', slug='old')
+        Post.objects.create(
+            title='В группе', text='Текст', author=self.author, group=group
+        )
+        urls = (reverse('posts:index'),
+                reverse('posts:profile', args=(self.author.username,)))
+        for url in urls:
+            self.assertContains(self.guest_client.get(url), '/group/old/')
+        group.slug = 'new'
+        group.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, '/group/new/')
+                self.assertNotContains(response, '/group/old/')
+
+    def test_group_delete_forgets_index(self):
+        group = Group.objects.create(title='Группа', slug='gone')
+        Post.objects.create(
+            title='В группе', text='Текст', author=self.author, group=group
+        )
+        url = reverse('posts:index')
+        self.assertContains(self.guest_client.get(url), '/group/gone/')
+        group.delete()
+        self.assertNotContains(self.guest_client.get(url), '/group/gone/')
+
+    def test_rename_forgets_author_cards(self):
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(
+            title='В группе', text='Текст', author=self.author, group=group
+        )
+        urls = (reverse('posts:index'),
+                reverse('posts:group_list', args=(group.slug,)))
+        for url in urls:
+            self.guest_client.get(url)
+        self.author.username = 'Renamed'
+        self.author.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Renamed')
+
+    def test_login_does_not_forget_pages(self):
+        """Сохранение last_login при входе кэш не сбрасывает."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        self.reader.save(update_fields=['last_login'])
+        self.assertServedFromCache(url)
+
+
+class SQLitePageCacheTest(SQLiteCacheMixin, PageCacheTest):
+    @override_settings(LOCAL_CACHE_TIMEOUT=0)
+    def test_local_cache_keeps_pages_briefly(self):
+        """Общий кэш хранит страницы полный срок."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        self.assertIsNotNone(cache.get(page_key(RequestFactory().get(url))))
@@ -0,0 +1,120 @@
+from http import HTTPStatus
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.budgets import get_query_budget
+from posts.models import Comment, Follow, Group, Like, Post, User
+from posts.stats import reconcile_posts, reconcile_users
+
+APPS = ('posts', 'users', 'about')
+SIZES = (10, 1000)
+
+
+def named_routes(resolver=None, namespace=None):
+    """Все именованные маршруты приложений APPS: (имя, pattern)."""
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name in APPS:
+                yield from named_routes(pattern, pattern.namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name and namespace:
+            yield f'{namespace}:{pattern.name}', pattern
+
+
+class QueryBudgetTest(TestCase):
+    """
+    Открывает каждую именованную страницу на данных двух размеров
+    и проверяет, что число запросов не зависит от объема данных
+    и укладывается в бюджет, объявленный у представления.
+    """
+
+    def seed(self, size):
+        author = User.objects.create_user(username=f'author{size}')
+        reader = User.objects.create_user(username=f'reader{size}')
+        group = Group.objects.create(
+            title='Группа', slug=f'group-{size}', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(title=f'Пост {i}', text='Текст', author=author, group=group)
+            for i in range(size)
+        )
+        posts = list(author.posts.values_list('pk', flat=True))
+        post = Post.objects.get(pk=posts[0])
+        Comment.objects.bulk_create(
+            Comment(post=post, author=reader, text='Комментарий')
+            for _ in range(size)
+        )
+        Like.objects.bulk_create(
+            Like(user=reader, post_id=pk) for pk in posts
+        )
+        Follow.objects.create(user=reader, author=author)
+        reconcile_posts()
+        reconcile_users()
+        return reader, {
+            'slug': group.slug,
+            'username': author.username,
+            'post_id': post.pk,
+            'pk': post.comments.values_list('pk', flat=True)[0],
+            'uidb64': urlsafe_base64_encode(force_bytes(reader.pk)),
+            'token': default_token_generator.make_token(reader),
+        }
+
+    def measure(self, name, pattern, user, kwargs):
+        """
+        Запросы страницы (POST, если GET не разрешен); изменения
+        данных после нее откатываются.
+        """
+        url = reverse(name, kwargs={
+            key: kwargs[key] for key in pattern.pattern.converters
+        })
+        with transaction.atomic():
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            if response.status_code == HTTPStatus.METHOD_NOT_ALLOWED:
+                with CaptureQueriesContext(connection) as queries:
+                    client.post(url)
+            transaction.set_rollback(True)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def test_views_fit_query_budgets(self):
+        """Число запросов постоянно и не больше бюджета."""
+        routes = list(named_routes())
+        self.assertTrue(routes)
+        measured = {}
+        for size in SIZES:
+            reader, kwargs = self.seed(size)
+            for name, pattern in routes:
+                for user in (None, reader):
+                    measured.setdefault((name, user is None), []).append(
+                        self.measure(name, pattern, user, kwargs)
+                    )
+
+        for name, pattern in routes:
+            budget = get_query_budget(pattern.callback)
+            with self.subTest(view=name):
+                self.assertIsNotNone(
+                    budget, f'{name}: бюджет запросов не объявлен'
+                )
+                for anonymous in (True, False):
+                    small, large = measured[name, anonymous]
+                    sql = '\n'.join(large)
+                    self.assertEqual(
+                        len(small), len(large),
+                        f'{name}: число запросов растет с данными:\n{sql}'
+                    )
+                    self.assertLessEqual(
+                        len(large), budget,
+                        f'{name}: {len(large)} запросов при бюджете '
+                        f'{budget}:\n{sql}'
+                    )
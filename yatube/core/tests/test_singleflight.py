@@ -0,0 +1,141 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import registry
+from core.pagecache import page_key
+from core.singleflight import acquire, get_or_build, release
+from core.testing import SQLiteCacheMixin
+from posts.models import Post
+
+User = get_user_model()
+
+
+def later(func, *args):
+    timer = threading.Timer(0.1, func, args)
+    timer.start()
+    return timer
+
+
+def avoided(kind, reason):
+    return dict(
+        (tuple(labels), value) for name, labels, value in registry.snapshot()
+        if name == 'yatube_cache_rebuilds_avoided_total'
+    ).get((('kind', kind), ('reason', reason)), 0)
+
+
+@override_settings(SINGLE_FLIGHT_WAIT=1)
+class SingleFlightTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def must_not_build(self):
+        self.fail('Значение собирает другой процесс')
+
+    def test_waiter_gets_value_built_elsewhere(self):
+        """Пока другой процесс собирает значение, остальные его ждут."""
+        self.assertTrue(acquire('key'))
+        timer = later(cache.set, 'key', 42)
+        value = get_or_build('key', self.must_not_build, 60, 'test')
+        self.assertEqual(value, 42)
+        timer.join()
+        self.assertEqual(avoided('test', 'waited'), 1)
+
+    def test_builds_when_lock_is_released_empty(self):
+        self.assertTrue(acquire('key'))
+        timer = later(release, 'key')
+        self.assertEqual(get_or_build('key', lambda: 7, 60, 'test'), 7)
+        timer.join()
+        self.assertEqual(cache.get('key'), 7)
+
+
+class PageSingleFlightTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Author')
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.guest_client = Client()
+
+    def test_stale_copy_is_served_during_rebuild(self):
+        """Пока страницу собирает другой процесс, отдается прежняя копия."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        Post.objects.create(
+            title='Новый пост', text='Текст', author=self.user
+        )
+        key = page_key(RequestFactory().get(url))
+        self.assertTrue(acquire(key))
+        self.assertNotContains(self.guest_client.get(url), 'Новый пост')
+        self.assertEqual(avoided('page', 'stale'), 1)
+        release(key)
+        self.assertContains(self.guest_client.get(url), 'Новый пост')
+
+    @override_settings(PAGE_CACHE_SOFT_TIMEOUT=0)
+    def test_expired_copy_is_rebuilt_after_response(self):
+        """Копия старше мягкого таймаута отдается и собирается заново."""
+        url = reverse('posts:index')
+        post = Post.objects.create(
+            title='Старый заголовок', text='Текст', author=self.user
+        )
+        self.guest_client.get(url)
+        # update() не отправляет сигналов, теги страницы не сброшены.
+        Post.objects.filter(pk=post.pk).update(title='Новый заголовок')
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Старый заголовок')
+        # Сохраняется общая копия с метками дыр, а не страница гостя.
+        entry = cache.get(page_key(RequestFactory().get(url)))
+        self.assertIn('<!--hole:', entry[3])
+        self.assertContains(self.guest_client.get(url), 'Новый заголовок')
+
+    @override_settings(PAGE_CACHE_SOFT_TIMEOUT=0)
+    def test_failed_revalidation_is_logged(self):
+        """Ошибка пересборки после ответа пишется в лог и метрики."""
+        url = reverse('posts:index')
+        Post.objects.create(title='Пост', text='Текст', author=self.user)
+        self.guest_client.get(url)
+
+        def broken(execute, sql, params, many, context):
+            raise OperationalError('database is locked')
+
+        with self.assertLogs('yatube.pagecache', 'ERROR'):
+            with connection.execute_wrapper(broken):
+                response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        errors = dict(
+            (tuple(labels), value)
+            for name, labels, value in registry.snapshot()
+            if name == 'yatube_page_cache_revalidation_errors_total'
+        )
+        self.assertEqual(errors, {(('view', 'posts:index'),): 1})
+
+    def test_stale_copy_is_served_on_database_error(self):
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        Post.objects.create(
+            title='Новый пост', text='Текст', author=self.user
+        )
+
+        def broken(execute, sql, params, many, context):
+            raise OperationalError('database is locked')
+
+        with connection.execute_wrapper(broken):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Page-Cache'], 'stale-if-error')
+        self.assertNotContains(response, 'Новый пост')
+
+
+class SQLiteSingleFlightTest(SQLiteCacheMixin, SingleFlightTest):
+    pass
+
+
+class SQLitePageSingleFlightTest(SQLiteCacheMixin, PageSingleFlightTest):
+    pass
@@ -1,7 +1,14 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from .metrics import registry, to_text
+
+# Заголовки, которые добавляет обратный прокси.
+PROXY_HEADERS = ('HTTP_X_FORWARDED_FOR', 'HTTP_X_REAL_IP', 'HTTP_FORWARDED')
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path},
@@ -23,3 +30,19 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """
+    Метрики всех процессов в текстовом формате Prometheus. Доступны
+    только адресам из METRICS_ALLOWED_IPS и только напрямую: за
+    обратным прокси REMOTE_ADDR у всех запросов один - адрес прокси.
+    """
+    proxied = any(header in request.META for header in PROXY_HEADERS)
+    if (proxied or request.META.get('REMOTE_ADDR')
+            not in settings.METRICS_ALLOWED_IPS):
+        raise Http404
+    return HttpResponse(
+        to_text(registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Group, Post, Comment, Follow, Like, BadWords
+from .models import (Group, Post, Comment, Follow, Like, BadWords, Violation,
+                     UserStats)
 
 
 @admin.register(Post)
@@ -41,7 +42,7 @@ class GroupFollow(admin.ModelAdmin):
 
 @admin.register(Like)
 class GroupLike(admin.ModelAdmin):
-    list_display = ('user', 'post', 'value',)
+    list_display = ('user', 'post', 'created',)
     search_fields = ('user__username', 'post__text',)
     list_per_page = 30
 
@@ -52,3 +53,20 @@ class GroupBadWords(admin.ModelAdmin):
     search_fields = ('word',)
     list_per_page = 50
     empty_value_display = '-пусто-'
+
+
+@admin.register(Violation)
+class GroupViolation(admin.ModelAdmin):
+    list_display = ('model', 'object_id', 'field', 'words', 'found_at',)
+    search_fields = ('words',)
+    list_filter = ('model', 'found_at',)
+    list_per_page = 50
+
+
+@admin.register(UserStats)
+class GroupUserStats(admin.ModelAdmin):
+    list_display = (
+        'user', 'posts_count', 'followers_count', 'following_count',
+    )
+    search_fields = ('user__username',)
+    list_per_page = 50
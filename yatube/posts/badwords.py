@@ -0,0 +1,353 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from core.metrics import registry
+
+from .models import BadWords
+
+BAD_WORD_RATIO = 0.25
+BAD_WORDS_VERSION_KEY = 'badwords:version'
+BAD_WORDS_VERSION_TIMEOUT = 10
+BAD_WORDS_KEY = 'badwords:words:{}'
+BAD_WORDS_TIMEOUT = 60 * 60 * 24
+VERDICT_KEY = 'badwords:verdict:{}:{}'
+VERDICT_CACHE_SIZE = 1024
+
+_compiled = (None, None)
+
+
+def max_distance(word):
+    """Допустимое число правок для слова: не больше 25% его длины."""
+    return int(len(word) * BAD_WORD_RATIO)
+
+
+def split_word(word, parts):
+    """Делит слово на parts непересекающихся кусков почти равной длины."""
+    size, extra = divmod(len(word), parts)
+    pieces, start = [], 0
+    for index in range(parts):
+        end = start + size + (index < extra)
+        pieces.append((start, word[start:end]))
+        start = end
+    return pieces
+
+
+def levenshtein_distance(word_fragment, word):
+    """Вычисляет расстояние Левенштейна между фрагментом и словом."""
+    n, m = len(word_fragment), len(word)
+    if n > m:
+        word_fragment, word = word, word_fragment
+        n, m = m, n
+
+    current_row = range(n + 1)
+    for i in range(1, m + 1):
+        previous_row, current_row = current_row, [i] + [0] * n
+        for j in range(1, n + 1):
+            add = previous_row[j] + 1
+            delete = current_row[j - 1] + 1
+            change = previous_row[j - 1]
+            if word_fragment[j - 1] != word[i - 1]:
+                change += 1
+            current_row[j] = min(add, delete, change)
+
+    return current_row[n]
+
+
+def bounded_levenshtein(word_fragment, word, limit):
+    """
+    Расстояние Левенштейна, если оно не больше limit, иначе limit + 1.
+
+    Считаются только клетки в полосе шириной limit вокруг диагонали
+    (Укконен): за ее пределами расстояние заведомо больше limit.
+    Минимум строки не убывает, поэтому расчет прекращается, как только
+    вся строка вышла за limit.
+    """
+    n, m = len(word_fragment), len(word)
+    if n > m:
+        word_fragment, word = word, word_fragment
+        n, m = m, n
+    over = limit + 1
+    if m - n > limit:
+        return over
+    if n == 0:
+        return m
+
+    previous_row = [j if j <= limit else over for j in range(n + 1)]
+    for i in range(1, m + 1):
+        current_row = [over] * (n + 1)
+        if i <= limit:
+            current_row[0] = i
+        char = word[i - 1]
+        for j in range(max(1, i - limit), min(n, i + limit) + 1):
+            current_row[j] = min(
+                previous_row[j - 1] + (word_fragment[j - 1] != char),
+                previous_row[j] + 1,
+                current_row[j - 1] + 1,
+                over,
+            )
+        if min(current_row) > limit:
+            return over
+        previous_row = current_row
+
+    return previous_row[n]
+
+
+class Normalizer:
+    """
+    Таблица замен похожих символов, скомпилированная из словаря один раз.
+
+    Одиночные символы заменяются через str.translate так же, как прежние
+    последовательные str.replace по словарю. Многосимвольные
+    последовательности ('sch', '}{', '|{') ищутся одним регулярным
+    выражением, где более длинные варианты стоят первыми, поэтому
+    в каждой позиции берется самое длинное совпадение.
+    """
+
+    def __init__(self, lookalikes):
+        sequences = {}
+        chars = set()
+        for key, letters in lookalikes.items():
+            for letter in letters:
+                if len(letter) > 1:
+                    sequences.setdefault(letter, key)
+                elif letter:
+                    chars.add(letter)
+        self.table = str.maketrans({
+            char: self._replace(char, lookalikes) for char in chars
+        })
+        self.sequences = sequences
+        self.pattern = None
+        if sequences:
+            self.pattern = re.compile('|'.join(
+                re.escape(sequence)
+                for sequence in sorted(sequences, key=len, reverse=True)
+            ))
+
+    @staticmethod
+    def _replace(char, lookalikes):
+        """Результат прежних последовательных замен для одного символа."""
+        for key, letters in lookalikes.items():
+            for letter in letters:
+                if char == letter:
+                    char = key
+        return char
+
+    def normalize(self, phrase):
+        """Заменяет похожие символы во фразе за один проход."""
+        if self.pattern is None:
+            return phrase.translate(self.table)
+        parts, start = [], 0
+        for match in self.pattern.finditer(phrase):
+            parts.append(phrase[start:match.start()].translate(self.table))
+            parts.append(self.sequences[match.group()])
+            start = match.end()
+        parts.append(phrase[start:].translate(self.table))
+        return ''.join(parts)
+
+
+class BadWordsMatcher:
+    """
+    Поиск 'плохих' слов с допуском в 25% правок от длины слова.
+
+    Каждое слово с допуском k делится на k + 1 кусков: при k правках
+    хотя бы один кусок остается во фрагменте нетронутым. Все куски
+    словаря один раз собираются в автомат Ахо-Корасик, который проходит
+    фразу за один проход. Расстояние Левенштейна считается только для
+    фрагментов рядом с найденными кусками, поэтому результат совпадает
+    с проверкой каждого слова на каждом фрагменте фразы.
+    """
+
+    def __init__(self, bad_words, version=None):
+        self.words = sorted(set(bad_words))
+        self.version = version
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for word in self.words:
+            if not word:
+                continue
+            limit = max_distance(word)
+            for offset, piece in split_word(word, limit + 1):
+                self._add_piece(piece, (word, offset, len(piece), limit))
+        self._build_links()
+
+    def __len__(self):
+        return len(self.words)
+
+    def _add_piece(self, piece, entry):
+        state = 0
+        for char in piece:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(entry)
+
+    def _build_links(self):
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._out[next_state] = (
+                    self._out[next_state] + self._out[fail]
+                )
+                queue.append(next_state)
+
+    def find(self, phrase):
+        """Возвращает множество слов словаря, найденных во фразе."""
+        found = set()
+        if not phrase:
+            return found
+        if self.words and not self.words[0]:
+            found.add('')
+        checked = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for position, char in enumerate(phrase):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for word, offset, length, limit in out[state]:
+                if word in found:
+                    continue
+                # Начало фрагмента сдвинуто от куска не больше чем на limit.
+                anchor = position - length + 1 - offset
+                for start in range(max(anchor - limit, 0),
+                                   min(anchor + limit + 1, len(phrase))):
+                    if (word, start) in checked:
+                        continue
+                    checked.add((word, start))
+                    fragment = phrase[start:start + len(word)]
+                    if bounded_levenshtein(fragment, word, limit) <= limit:
+                        found.add(word)
+                        break
+        return found
+
+
+def get_version():
+    """
+    Текущая версия словаря: число слов и время последней правки.
+    Считается в базе и кэшируется на BAD_WORDS_VERSION_TIMEOUT, поэтому
+    правку увидят все процессы, даже если кэш у каждого свой.
+    """
+    version = cache.get(BAD_WORDS_VERSION_KEY)
+    if version is None:
+        state = BadWords.objects.aggregate(
+            count=Count('pk'), updated=Max('updated')
+        )
+        updated = state['updated']
+        version = '{}-{}'.format(
+            state['count'], int(updated.timestamp() * 10 ** 6)
+            if updated else 0
+        )
+        cache.set(BAD_WORDS_VERSION_KEY, version, BAD_WORDS_VERSION_TIMEOUT)
+    return version
+
+
+def forget_version():
+    """Сбрасывает закэшированную версию после изменения BadWords."""
+    cache.delete(BAD_WORDS_VERSION_KEY)
+
+
+def get_bad_words(version):
+    """Список слов версии version: из общего кэша, иначе из базы."""
+    key = BAD_WORDS_KEY.format(version)
+    words = cache.get(key)
+    if words is None:
+        words = list(BadWords.objects.values_list('word', flat=True))
+        cache.set(key, words, BAD_WORDS_TIMEOUT)
+    return words
+
+
+def get_matcher():
+    """
+    Скомпилированный словарь текущей версии. Хранится в памяти
+    процесса и пересобирается, только когда версия поменялась.
+    """
+    global _compiled
+    version = get_version()
+    compiled_version, matcher = _compiled
+    if matcher is None or compiled_version != version:
+        matcher = BadWordsMatcher(get_bad_words(version), version)
+        _compiled = (version, matcher)
+    return matcher
+
+
+class VerdictCache:
+    """
+    Кэш результатов проверки: LRU в памяти процесса и общий кэш.
+
+    Ключ состоит из версии словаря и хэша нормализованной фразы,
+    поэтому неизмененный текст повторно не просматривается, а после
+    правки BadWords все старые ответы перестают находиться.
+    """
+
+    def __init__(self, size=VERDICT_CACHE_SIZE):
+        self.size = size
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = self.shared_hits = self.misses = 0
+
+    def find(self, phrase, matcher):
+        """Слова словаря во фразе: из кэша или через matcher.find."""
+        started = time.perf_counter()
+        result, verdict = self._find(phrase, matcher)
+        registry.observe('yatube_badwords_check_seconds',
+                         time.perf_counter() - started, result=result)
+        return set(verdict)
+
+    def _find(self, phrase, matcher):
+        if matcher.version is None:
+            return 'uncached', matcher.find(phrase)
+        digest = hashlib.sha1(phrase.encode()).hexdigest()
+        key = VERDICT_KEY.format(matcher.version, digest)
+        with self._lock:
+            verdict = self._local.get(key)
+            if verdict is not None:
+                self._local.move_to_end(key)
+                self.local_hits += 1
+                return 'local_hit', verdict
+
+        verdict = cache.get(key)
+        shared_hit = verdict is not None
+        if not shared_hit:
+            verdict = tuple(sorted(matcher.find(phrase)))
+            cache.set(key, verdict, BAD_WORDS_TIMEOUT)
+
+        with self._lock:
+            if shared_hit:
+                self.shared_hits += 1
+            else:
+                self.misses += 1
+            self._local[key] = verdict
+            if len(self._local) > self.size:
+                self._local.popitem(last=False)
+        return 'shared_hit' if shared_hit else 'miss', verdict
+
+    def stats(self):
+        """Счетчики попаданий и промахов."""
+        total = self.local_hits + self.shared_hits + self.misses
+        hits = self.local_hits + self.shared_hits
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+
+verdicts = VerdictCache()
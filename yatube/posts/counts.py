@@ -0,0 +1,53 @@
+from django.core.cache import cache
+
+from core.cache import shared_timeout
+from core.singleflight import get_or_build
+
+from .models import Follow, Like
+
+COUNT_KEY = 'posts:count:{}'
+COUNT_TIMEOUT = 60 * 60
+
+
+def count_key(name):
+    return COUNT_KEY.format(name)
+
+
+def cached_count(name, queryset):
+    """
+    Число записей ленты из кэша; COUNT выполняется только при промахе
+    и только в одном процессе.
+    """
+    return get_or_build(
+        count_key(name), queryset.count, shared_timeout(COUNT_TIMEOUT),
+        kind='count'
+    )
+
+
+def forget_post_counts(author_id, *group_ids):
+    """Сбрасывает счетчики лент, в которые попадает пост."""
+    names = ['index', f'author:{author_id}']
+    names += [f'group:{pk}' for pk in group_ids if pk is not None]
+    cache.delete_many([count_key(name) for name in names])
+
+
+def forget_liked_counts(user_ids):
+    cache.delete_many([count_key(f'liked:{pk}') for pk in user_ids])
+
+
+def forget_reader_counts(post_id, author_id):
+    """
+    Сбрасывает счетчики лент подписок и избранного, в которых пост
+    появляется или пропадает при смене статуса: у подписчиков автора
+    и у лайкнувших пост.
+    """
+    follower_ids = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True
+    )
+    liker_ids = Like.objects.filter(post_id=post_id).values_list(
+        'user_id', flat=True
+    )
+    cache.delete_many(
+        [count_key(f'follow:{pk}') for pk in follower_ids]
+        + [count_key(f'liked:{pk}') for pk in liker_ids]
+    )
@@ -1,6 +1,9 @@
 from django import forms
+from django.conf import settings
 
-from .models import Post, Comment, BadWords
+from .badwords import (Normalizer, bounded_levenshtein, get_matcher,
+                       levenshtein_distance, verdicts)
+from .models import Post, Comment
 
 
 class CommentForm(forms.ModelForm):
@@ -10,8 +13,7 @@ class CommentForm(forms.ModelForm):
 
     def clean_text(self):
         data = self.cleaned_data['text']
-        filtered = FilterBadWords()
-        return filtered.start_filtering(data)
+        return filter_bad_words(data)
 
 
 class PostForm(forms.ModelForm):
@@ -21,8 +23,7 @@ class PostForm(forms.ModelForm):
 
     def clean_title(self):
         data = self.cleaned_data['title']
-        filtered = FilterBadWords()
-        return filtered.start_filtering(data)
+        return filter_bad_words(data)
 
     def clean_subject(self):
         data = self.cleaned_data['text']
@@ -30,8 +31,17 @@ class PostForm(forms.ModelForm):
 
     def clean_text(self):
         data = self.cleaned_data['text']
-        filtered = FilterBadWords()
-        return filtered.start_filtering(data)
+        return filter_bad_words(data)
+
+
+def filter_bad_words(data):
+    """
+    Проверяет текст на запрещенные слова. При отложенной модерации
+    проверку выполняет команда moderate уже после сохранения.
+    """
+    if settings.ASYNC_MODERATION:
+        return data
+    return FilterBadWords().start_filtering(data)
 
 
 class FilterBadWords:
@@ -75,21 +85,20 @@ class FilterBadWords:
         'ю': ['ю', 'io', 'yu'],
         'я': ['я', 'ya']
     }
+    normalizer = Normalizer(mydict)
 
     def __init__(self):
         self.raw_phrase = None
 
     def get_bad_words(self):
-        return [one.word for one in BadWords.objects.all()]
+        return get_matcher().words
 
-    def censor(self, phrase, bad_words):
+    def get_matcher(self):
+        return get_matcher()
+
+    def censor(self, phrase, matcher):
         """Сравнивает запрещенные слова с подготовленными фрагментами фразы."""
-        error_set = set()
-        for bad_word in bad_words:
-            for part in range(len(phrase)):
-                fragment = phrase[part: part + len(bad_word)]
-                if self.levenshtein_distance(fragment, bad_word) <= len(bad_word) * 0.25:
-                    error_set.add(bad_word)
+        error_set = verdicts.find(phrase, matcher)
 
         if len(error_set):
             error_list = sorted(list(set(error_set)))
@@ -100,40 +109,24 @@ class FilterBadWords:
         else:
             return self.raw_phrase
 
-    @staticmethod
-    def comparison(input_dict, input_phrase):
-        """Сравнивает символы во фразе с символами в словаре."""
-        for key, value in input_dict.items():
-            for letter in value:
-                for symbol in input_phrase:
-                    if letter == symbol:
-                        input_phrase = input_phrase.replace(symbol, key)
-        return input_phrase
-
-    @staticmethod
-    def levenshtein_distance(word_fragment, word):
-        """Вычисляет расстояние Левенштейна между фрагментом и словом."""
-        n, m = len(word_fragment), len(word)
-        if n > m:
-            # Make sure n <= m, to use O(min(n, m)) space
-            word_fragment, word = word, word_fragment
-            n, m = m, n
-
-        current_row = range(n + 1)  # Keep current and previous row, not entire matrix
-        for i in range(1, m + 1):
-            previous_row, current_row = current_row, [i] + [0] * n
-            for j in range(1, n + 1):
-                add, delete, change = previous_row[j] + 1, current_row[j - 1] + 1, previous_row[j - 1]
-                if word_fragment[j - 1] != word[i - 1]:
-                    change += 1
-                current_row[j] = min(add, delete, change)
-
-        return current_row[n]
+    def comparison(self, input_phrase):
+        """Заменяет похожие символы во фразе на буквы из словаря."""
+        return self.normalizer.normalize(input_phrase)
+
+    levenshtein_distance = staticmethod(levenshtein_distance)
+    bounded_levenshtein = staticmethod(bounded_levenshtein)
+
+    def prepare(self, input_phrase):
+        """Готовит фразу к поиску: регистр, пробелы, похожие символы."""
+        return self.comparison(input_phrase.lower().replace(' ', ''))
+
+    def find_bad_words(self, input_phrase):
+        """Возвращает множество запрещенных слов, найденных во фразе."""
+        return verdicts.find(self.prepare(input_phrase), self.get_matcher())
 
     def start_filtering(self, input_phrase):
         self.raw_phrase = input_phrase
-        input_phrase = input_phrase.lower().replace(' ', '')
-        bad_words = self.get_bad_words()
+        matcher = self.get_matcher()
 
-        filtered_phrase = self.comparison(self.mydict, input_phrase)
-        return self.censor(filtered_phrase, bad_words)
+        filtered_phrase = self.prepare(input_phrase)
+        return self.censor(filtered_phrase, matcher)
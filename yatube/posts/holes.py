@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+from core.pagecache import hole, without_params
+
+from .forms import CommentForm
+from .likes import liked_post_ids
+from .models import Follow
+
+hole('switcher', 'posts/includes/switcher.html')(without_params)
+
+
+@hole('like', 'posts/includes/like_card.html')
+def like_holes(request, params):
+    liked = liked_post_ids(request.user, [item['id'] for item in params])
+    return [
+        {'post': SimpleNamespace(is_liked=item['id'] in liked, **item)}
+        for item in params
+    ]
+
+
+@hole('follow', 'posts/includes/follow_card.html')
+def follow_holes(request, params):
+    following = set()
+    if request.user.is_authenticated:
+        following = set(Follow.objects.filter(
+            user=request.user, author_id__in=[item['pk'] for item in params]
+        ).values_list('author_id', flat=True))
+    return [
+        {
+            'author': SimpleNamespace(**item),
+            'following': item['pk'] in following,
+        }
+        for item in params
+    ]
+
+
+@hole('post_actions', 'posts/includes/post_actions.html')
+def post_actions_holes(request, params):
+    return [{'post': SimpleNamespace(**item)} for item in params]
+
+
+@hole('comment_actions', 'posts/includes/comment_actions.html')
+def comment_actions_holes(request, params):
+    return [{'comment': SimpleNamespace(**item)} for item in params]
+
+
+@hole('comment_form', 'posts/includes/comment_form.html')
+def comment_form_holes(request, params):
+    return [
+        {'post': SimpleNamespace(**item), 'form': CommentForm()}
+        for item in params
+    ]
@@ -0,0 +1,69 @@
+from django.db import IntegrityError, transaction
+
+from core.pagecache import forget_pages
+
+from .counts import forget_liked_counts
+from .models import Like
+from .pages import post_tag
+from .stats import change_post_counters
+
+
+def liked_post_ids(user, post_ids):
+    """Множество pk постов из post_ids, которые лайкнул user."""
+    if not user.is_authenticated or not post_ids:
+        return set()
+    return set(
+        Like.objects.filter(
+            user_id=user.pk, post_id__in=post_ids
+        ).values_list('post_id', flat=True)
+    )
+
+
+def mark_liked(posts, user):
+    """
+    Проставляет post.is_liked всем постам страницы одним запросом,
+    чтобы карточки не загружали список лайкнувших.
+    """
+    posts = list(posts)
+    liked = liked_post_ids(user, [post.pk for post in posts])
+    for post in posts:
+        post.is_liked = post.pk in liked
+    return liked
+
+
+def apply_likes(links, delta, liker_id=None):
+    """Меняет likes_count постов и сбрасывает ленты лайков и страницы."""
+    forget_pages(*{post_tag(post_id) for post_id, _ in links})
+    if liker_id is not None:
+        change_post_counters([post_id for post_id, _ in links],
+                             likes_count=delta)
+        forget_liked_counts([liker_id])
+    else:
+        change_post_counters([links[0][0]], likes_count=delta * len(links))
+        forget_liked_counts([user_id for _, user_id in links])
+
+
+def toggle_like(user_id, post_id):
+    """
+    Ставит или снимает лайк и возвращает True, если лайк теперь стоит.
+
+    Сначала выполняется DELETE по паре (user, post); если удалять было
+    нечего, выполняется INSERT. Уникальность пары не дает параллельным
+    кликам создать дубликат, а счетчик меняется только на реально
+    удаленную или вставленную строку.
+    """
+    with transaction.atomic():
+        deleted, _ = Like.objects.filter(
+            user_id=user_id, post_id=post_id
+        ).delete()
+        if deleted:
+            apply_likes([(post_id, user_id)], -1, user_id)
+            return False
+        try:
+            with transaction.atomic():
+                Like.objects.create(user_id=user_id, post_id=post_id)
+        except IntegrityError:
+            # Лайк уже поставлен параллельным запросом.
+            return True
+        apply_likes([(post_id, user_id)], 1, user_id)
+        return True
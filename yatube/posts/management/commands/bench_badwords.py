@@ -0,0 +1,75 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.badwords import BadWordsMatcher, max_distance
+from posts.forms import FilterBadWords
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыьэюя'
+
+
+def naive_find(phrase, bad_words):
+    """Прежний алгоритм: каждое слово на каждом фрагменте фразы."""
+    found = set()
+    for bad_word in bad_words:
+        for part in range(len(phrase)):
+            fragment = phrase[part: part + len(bad_word)]
+            distance = FilterBadWords.levenshtein_distance(fragment, bad_word)
+            if distance <= max_distance(bad_word):
+                found.add(bad_word)
+    return found
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость прежнего фильтра и BadWordsMatcher'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, default=200)
+        parser.add_argument('--length', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        bad_words = {
+            ''.join(rnd.choice(ALPHABET) for _ in range(rnd.randint(3, 10)))
+            for _ in range(options['words'])
+        }
+        phrase = ''.join(
+            rnd.choice(ALPHABET) for _ in range(options['length'])
+        )
+
+        started = time.perf_counter()
+        matcher = BadWordsMatcher(bad_words)
+        compile_time = time.perf_counter() - started
+
+        naive_time, expected = self.measure(
+            options['repeat'], naive_find, phrase, bad_words
+        )
+        matcher_time, found = self.measure(
+            options['repeat'], matcher.find, phrase
+        )
+        if found != expected:
+            raise CommandError(
+                f'Результаты расходятся: {sorted(found ^ expected)}'
+            )
+
+        self.stdout.write(
+            f'Слов: {len(bad_words)}, длина текста: {len(phrase)}, '
+            f'найдено: {len(found)}'
+        )
+        self.stdout.write(f'Компиляция словаря: {compile_time * 1000:.1f} мс')
+        self.stdout.write(f'Прежний алгоритм:   {naive_time * 1000:.1f} мс')
+        self.stdout.write(f'BadWordsMatcher:    {matcher_time * 1000:.1f} мс')
+        self.stdout.write(f'Ускорение: x{naive_time / matcher_time:.1f}')
+
+    @staticmethod
+    def measure(repeat, func, *args):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func(*args)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
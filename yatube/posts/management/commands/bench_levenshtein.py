@@ -0,0 +1,38 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from posts.badwords import (bounded_levenshtein, levenshtein_distance,
+                            max_distance)
+
+CASES = {
+    'совпадение': ('апельсинка', 'апельсинка'),
+    'одна правка': ('апельсинка', 'апельсинко'),
+    'ранний отказ': ('ягодкаплод', 'апельсинка'),
+    'разная длина': ('апельсин', 'апельсинкаягодка'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Микробенчмарк levenshtein_distance и bounded_levenshtein'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        number = options['number']
+        for name, (fragment, word) in CASES.items():
+            limit = max_distance(word)
+            full = timeit.timeit(
+                lambda: levenshtein_distance(fragment, word) <= limit,
+                number=number
+            )
+            bounded = timeit.timeit(
+                lambda: bounded_levenshtein(fragment, word, limit) <= limit,
+                number=number
+            )
+            self.stdout.write(
+                f'{name:>14}: полный {full / number * 1e6:6.2f} мкс, '
+                f'с порогом {bounded / number * 1e6:6.2f} мкс, '
+                f'x{full / bounded:.1f}'
+            )
@@ -0,0 +1,109 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.pagecache import forget_pages
+from posts.counts import forget_post_counts, forget_reader_counts
+from posts.forms import FilterBadWords
+from posts.models import (PENDING, PUBLISHED, REJECTED, Comment, Post,
+                          Violation)
+from posts.pages import comments_tag, forget_post_pages
+from posts.stats import change_post_counters, change_user_stats
+from posts.timeline import fan_out
+
+SOURCES = {
+    Violation.POST: (Post, ('title', 'text')),
+    Violation.COMMENT: (Comment, ('text',)),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет посты и комментарии со статусом "на модерации" '
+        'и публикует или отклоняет их'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, опрашивая очередь',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.MODERATION_INTERVAL,
+            help='Пауза между опросами пустой очереди, секунды',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = sum(
+                self.moderate(model, options['batch_size'])
+                for model in SOURCES
+            )
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def moderate(self, model, batch_size):
+        """Проверяет одну пачку очереди и возвращает ее размер."""
+        source, fields = SOURCES[model]
+        batch = list(
+            source.objects.filter(status=PENDING)
+            .order_by('pk')
+            .values('pk', *fields)[:batch_size]
+        )
+        filter_words = FilterBadWords()
+        for row in batch:
+            found = {
+                field: filter_words.find_bad_words(row[field])
+                for field in fields
+            }
+            found = {field: words for field, words in found.items() if words}
+            # Текст сверяется с прочитанным: если автор успел его
+            # изменить, запись останется в очереди до следующей пачки.
+            updated = source.objects.filter(status=PENDING, **row).update(
+                status=REJECTED if found else PUBLISHED
+            )
+            if not updated:
+                continue
+            if not found:
+                self.published(source, row['pk'])
+            elif source is Post:
+                post = Post.objects.get(pk=row['pk'])
+                forget_post_counts(post.author_id, post.group_id)
+                forget_reader_counts(post.pk, post.author_id)
+                forget_post_pages(post.pk, post.author_id, post.group_id)
+            Violation.objects.filter(model=model, object_id=row['pk']).delete()
+            for field, words in found.items():
+                Violation.objects.create(
+                    model=model, object_id=row['pk'], field=field,
+                    words=', '.join(sorted(words)),
+                )
+            self.stdout.write(
+                f'{model} #{row["pk"]}: '
+                f'{"отклонено" if found else "опубликовано"}'
+            )
+        return len(batch)
+
+    @staticmethod
+    def published(source, pk):
+        """
+        update() не шлет сигналов: счетчики, ленты подписок и кэш
+        страниц для опубликованной записи обновляются здесь.
+        """
+        if source is Comment:
+            post_id = Comment.objects.values_list('post_id', flat=True).get(
+                pk=pk
+            )
+            change_post_counters([post_id], comments_count=1)
+            forget_pages(comments_tag(post_id))
+            return
+        post = Post.objects.get(pk=pk)
+        forget_post_counts(post.author_id, post.group_id)
+        forget_reader_counts(post.pk, post.author_id)
+        forget_post_pages(post.pk, post.author_id, post.group_id)
+        fan_out(post)
+        change_user_stats(post.author_id, posts_count=1)
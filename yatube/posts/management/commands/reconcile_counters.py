@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.pagecache import ALL_PAGES, forget_pages
+from posts.stats import reconcile_posts, reconcile_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счетчики лайков, комментариев, постов и подписок '
+        'по данным таблиц'
+    )
+
+    def handle(self, *args, **options):
+        posts = reconcile_posts()
+        users = reconcile_users()
+        forget_pages(ALL_PAGES)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано постов: {posts}, пользователей: {users}'
+        ))
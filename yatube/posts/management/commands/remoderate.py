@@ -0,0 +1,198 @@
+import json
+import os
+import time
+from collections import deque
+from itertools import chain
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from posts.badwords import BadWordsMatcher, get_bad_words, get_version
+from posts.forms import FilterBadWords
+from posts.models import Comment, Post, Violation
+
+SOURCES = {
+    Violation.POST: (Post, ('title', 'text')),
+    Violation.COMMENT: (Comment, ('text',)),
+}
+
+_worker = {}
+
+
+def init_worker(bad_words):
+    """Компилирует словарь один раз в каждом процессе пула."""
+    _worker['matcher'] = BadWordsMatcher(bad_words)
+    _worker['filter'] = FilterBadWords()
+
+
+def check_chunk(rows):
+    """Проверяет пачку строк (pk, ((поле, текст), ...)) на нарушения."""
+    matcher, filter_words = _worker['matcher'], _worker['filter']
+    found = []
+    for pk, fields in rows:
+        for field, text in fields:
+            words = matcher.find(filter_words.prepare(text or ''))
+            if words:
+                found.append((pk, field, ', '.join(sorted(words))))
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново проверяет все посты и комментарии по словарю BadWords '
+        'и записывает найденные нарушения в таблицу Violation'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=(*SOURCES, 'all'), default='all'
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'JSON-файл с последним обработанным pk для продолжения; '
+                'удаляется после полного прохода'
+            ),
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, не читая checkpoint',
+        )
+
+    def handle(self, *args, **options):
+        version = get_version()
+        bad_words = get_bad_words(version)
+        checkpoint = self.load_checkpoint(options, version)
+        models = SOURCES if options['model'] == 'all' else [options['model']]
+
+        workers = max(options['workers'] or 1, 1)
+        pool = None
+        if workers > 1:
+            # Дочерние процессы не работают с базой, соединение
+            # родителя не должно попасть в них открытым.
+            connections.close_all()
+            pool = Pool(workers, init_worker, (bad_words,))
+        else:
+            init_worker(bad_words)
+
+        try:
+            for model in models:
+                self.process(model, checkpoint, pool, workers, options)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        self.finish_checkpoint(models, checkpoint, options)
+
+    def process(self, model, checkpoint, pool, workers, options):
+        started = time.perf_counter()
+        rows = violations = 0
+        # Не больше двух пачек на процесс в работе: память не растет
+        # с размером таблицы, а нарушения пишутся по порядку pk.
+        window = workers * 2 if pool is not None else 0
+        pending = deque()
+        chunks = self.chunks(
+            model, checkpoint.get(model, 0), options['chunk_size']
+        )
+        for chunk in chain(chunks, [None]):
+            if chunk is None:
+                window = 0
+            elif pool is None:
+                pending.append((chunk, check_chunk(chunk)))
+            else:
+                pending.append(
+                    (chunk, pool.apply_async(check_chunk, (chunk,)))
+                )
+            while len(pending) > window:
+                done, result = pending.popleft()
+                if pool is not None:
+                    result = result.get()
+                violations += self.save(model, done, result)
+                rows += len(done)
+                checkpoint[model] = done[-1][0]
+                self.report(model, rows, violations, started, checkpoint,
+                            options)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{model}: проверено {rows} записей, нарушений {violations}, '
+            f'{rows / elapsed if elapsed else 0:.0f} записей/с'
+        ))
+
+    @staticmethod
+    def chunks(model, last_pk, chunk_size):
+        """Потоково читает записи пачками, начиная после last_pk."""
+        source, fields = SOURCES[model]
+        queryset = (
+            source.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', *fields)
+        )
+        chunk = []
+        for row in queryset.iterator(chunk_size=chunk_size):
+            chunk.append((row[0], tuple(zip(fields, row[1:]))))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def save(model, chunk, result):
+        """Заменяет нарушения для записей пачки на найденные сейчас."""
+        with transaction.atomic():
+            Violation.objects.filter(
+                model=model,
+                object_id__gte=chunk[0][0],
+                object_id__lte=chunk[-1][0],
+            ).delete()
+            Violation.objects.bulk_create(
+                Violation(model=model, object_id=pk, field=field, words=words)
+                for pk, field, words in result
+            )
+        return len(result)
+
+    def report(self, model, rows, violations, started, checkpoint,
+               options):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{model}: {rows} записей до pk={checkpoint[model]}, '
+            f'нарушений {violations}, '
+            f'{rows / elapsed if elapsed else 0:.0f} записей/с'
+        )
+        if options['checkpoint']:
+            with open(options['checkpoint'], 'w') as file:
+                json.dump(checkpoint, file)
+
+    @staticmethod
+    def load_checkpoint(options, version):
+        """
+        Прогресс прошлого запуска. Если словарь с тех пор изменился,
+        проверка начинается сначала: старые записи надо проверить
+        по новым словам.
+        """
+        path = options['checkpoint']
+        if options['restart'] or not path or not os.path.exists(path):
+            return {'version': version}
+        with open(path) as file:
+            checkpoint = json.load(file)
+        if checkpoint.get('version') != version:
+            return {'version': version}
+        return checkpoint
+
+    @staticmethod
+    def finish_checkpoint(models, checkpoint, options):
+        """Забывает прогресс моделей, проверенных до конца."""
+        path = options['checkpoint']
+        if not path:
+            return
+        for model in models:
+            checkpoint.pop(model, None)
+        if set(checkpoint) - {'version'}:
+            with open(path, 'w') as file:
+                json.dump(checkpoint, file)
+        elif os.path.exists(path):
+            os.remove(path)
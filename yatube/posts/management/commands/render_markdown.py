@@ -0,0 +1,121 @@
+import os
+import time
+from collections import deque
+from itertools import chain
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from core.pagecache import ALL_PAGES, forget_pages
+from posts.markup import make_excerpt, markup_version, render_markdown
+from posts.models import Comment, Post
+
+SOURCES = {
+    'post': Post,
+    'comment': Comment,
+}
+
+
+def render_chunk(rows, excerpts=False):
+    """Отрисовывает пачку строк (pk, text) в поля HTML для update()."""
+    rendered = []
+    for pk, text in rows:
+        fields = {'text_html': render_markdown(text)}
+        if excerpts:
+            fields['text_excerpt'] = make_excerpt(fields['text_html'])
+        rendered.append((pk, fields))
+    return rendered
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново отрисовывает Markdown постов и комментариев, HTML которых '
+        'устарел после изменения MARKDOWN_EXTENSIONS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=(*SOURCES, 'all'), default='all'
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Отрисовать все записи, а не только устаревшие',
+        )
+
+    def handle(self, *args, **options):
+        models = SOURCES if options['model'] == 'all' else [options['model']]
+        workers = max(options['workers'] or 1, 1)
+        pool = None
+        if workers > 1:
+            connections.close_all()
+            pool = Pool(workers)
+        try:
+            for model in models:
+                self.process(SOURCES[model], pool, workers, options)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        forget_pages(ALL_PAGES)
+
+    def process(self, source, pool, workers, options):
+        started = time.perf_counter()
+        version = markup_version()
+        queryset = source.objects.order_by('pk')
+        if not options['all']:
+            queryset = queryset.exclude(html_version=version)
+        excerpts = hasattr(source, 'text_excerpt')
+        rows = 0
+        # Как в remoderate: не больше двух пачек на процесс в работе.
+        window = workers * 2 if pool is not None else 0
+        pending = deque()
+        chunks = self.chunks(queryset, options['chunk_size'])
+        for chunk in chain(chunks, [None]):
+            if chunk is None:
+                window = 0
+            elif pool is None:
+                pending.append((chunk, render_chunk(chunk, excerpts)))
+            else:
+                pending.append(
+                    (chunk, pool.apply_async(render_chunk, (chunk, excerpts)))
+                )
+            while len(pending) > window:
+                done, result = pending.popleft()
+                if pool is not None:
+                    result = result.get()
+                rows += self.save(source, done, result, version)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{source._meta.model_name}: отрисовано {rows} записей, '
+            f'{rows / elapsed if elapsed else 0:.0f} записей/с'
+        ))
+
+    @staticmethod
+    def chunks(queryset, chunk_size):
+        chunk = []
+        rows = queryset.values_list('pk', 'text')
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def save(source, chunk, result, version):
+        """
+        Сохраняет HTML, только если текст не изменился с момента
+        чтения: иначе его уже отрисовало сохранение новой версии.
+        """
+        saved = 0
+        with transaction.atomic():
+            for (pk, text), (_, fields) in zip(chunk, result):
+                saved += source.objects.filter(pk=pk, text=text).update(
+                    html_version=version, **fields
+                )
+        return saved
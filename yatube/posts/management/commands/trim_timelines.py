@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Follow, TimelineEntry
+from posts.timeline import backfill, trim
+
+
+class Command(BaseCommand):
+    help = 'Обрезает ленты подписок до TIMELINE_LENGTH последних записей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--length', type=int, default=settings.TIMELINE_LENGTH
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Сначала заполнить ленты по всем существующим подпискам',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            follows = Follow.objects.values_list(
+                'user_id', 'author_id').iterator()
+            for user_id, author_id in follows:
+                backfill(user_id, author_id)
+
+        deleted = 0
+        user_ids = list(
+            TimelineEntry.objects.order_by('user_id')
+            .values_list('user_id', flat=True).distinct()
+        )
+        for user_id in user_ids:
+            deleted += trim(user_id, options['length'])
+        self.stdout.write(self.style.SUCCESS(f'Удалено записей: {deleted}'))
@@ -0,0 +1,131 @@
+import hashlib
+import json
+from html.parser import HTMLParser
+
+import markdown
+from django.conf import settings
+
+
+def markup_version():
+    """
+    Версия отрисовки: меняется вместе с набором расширений Markdown,
+    версией библиотеки или длиной отрывка, после чего сохраненный HTML
+    устаревает.
+    """
+    key = json.dumps([settings.MARKDOWN_EXTENSIONS, markdown.__version__,
+                      settings.POST_EXCERPT_LENGTH])
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def render_markdown(text):
+    return markdown.markdown(
+        text or '', extensions=settings.MARKDOWN_EXTENSIONS
+    )
+
+
+def render_text(instance):
+    """
+    Заполняет text_html, если текст изменился с момента загрузки
+    или HTML отрисован другой версией.
+    """
+    version = markup_version()
+    if (instance.text == getattr(instance, '_loaded_text', None)
+            and instance.html_version == version):
+        return False
+    instance.text_html = render_markdown(instance.text)
+    if hasattr(instance, 'text_excerpt'):
+        instance.text_excerpt = make_excerpt(instance.text_html)
+    instance.html_version = version
+    instance._loaded_text = instance.text
+    return True
+
+
+# Элементы без закрывающего тега.
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'source', 'track', 'wbr',
+}
+
+
+class ExcerptParser(HTMLParser):
+    """
+    Копирует HTML, пока не наберет limit символов текста, после чего
+    ставит многоточие и закрывает оставшиеся открытыми теги.
+    """
+
+    def __init__(self, limit):
+        super().__init__(convert_charrefs=False)
+        self.limit = limit
+        self.length = 0
+        self.parts = []
+        self.open_tags = []
+        self.truncated = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.truncated:
+            return
+        self.parts.append(self.get_starttag_text())
+        if tag not in VOID_ELEMENTS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.truncated:
+            self.parts.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if self.truncated or tag not in self.open_tags:
+            return
+        while self.open_tags:
+            opened = self.open_tags.pop()
+            self.parts.append(f'</{opened}>')
+            if opened == tag:
+                break
+
+    def handle_data(self, data):
+        if self.truncated:
+            return
+        if not data.strip():
+            self.parts.append(data)
+            return
+        rest = self.limit - self.length
+        if len(data) <= rest:
+            self.parts.append(data)
+            self.length += len(data)
+            return
+        cut = data[:rest]
+        if not data[rest].isspace():
+            # Недописанное слово отбрасывается целиком.
+            cut = cut.rsplit(' ', 1)[0] if ' ' in cut else ''
+        self.parts.append(cut.rstrip() + '…')
+        self.truncated = True
+
+    def add_char(self, text):
+        if self.truncated:
+            return
+        if self.length >= self.limit:
+            self.parts.append('…')
+            self.truncated = True
+            return
+        self.parts.append(text)
+        self.length += 1
+
+    def handle_entityref(self, name):
+        self.add_char(f'&{name};')
+
+    def handle_charref(self, name):
+        self.add_char(f'&#{name};')
+
+    def excerpt(self):
+        closing = ''.join(f'</{tag}>' for tag in reversed(self.open_tags))
+        return ''.join(self.parts) + closing
+
+
+def make_excerpt(html, limit=None):
+    """
+    Отрывок HTML для ленты: не длиннее limit символов текста,
+    обрезан по слову, все теги закрыты.
+    """
+    parser = ExcerptParser(limit or settings.POST_EXCERPT_LENGTH)
+    parser.feed(html)
+    parser.close()
+    return parser.excerpt()
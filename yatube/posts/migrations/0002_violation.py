@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Violation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10, verbose_name='Тип записи')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID записи')),
+                ('field', models.CharField(max_length=20, verbose_name='Поле')),
+                ('words', models.CharField(max_length=255, verbose_name='Найденные слова')),
+                ('found_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата проверки')),
+            ],
+            options={
+                'verbose_name': 'Нарушение',
+                'verbose_name_plural': 'Нарушения',
+                'ordering': ['-found_at'],
+                'unique_together': {('model', 'object_id', 'field')},
+            },
+        ),
+    ]
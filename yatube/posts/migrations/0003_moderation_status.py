@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_violation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='status',
+            field=models.CharField(choices=[('published', 'Опубликовано'), ('pending', 'На модерации'), ('rejected', 'Отклонено')], db_index=True, default='published', max_length=10, verbose_name='Статус модерации'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='status',
+            field=models.CharField(choices=[('published', 'Опубликовано'), ('pending', 'На модерации'), ('rejected', 'Отклонено')], db_index=True, default='published', max_length=10, verbose_name='Статус модерации'),
+        ),
+    ]
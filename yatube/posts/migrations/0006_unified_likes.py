@@ -0,0 +1,86 @@
+# Generated by Django 2.2.16 on 2026-10-18 16:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+BATCH_SIZE = 1000
+
+
+def merge_likes(apps, schema_editor):
+    """
+    Переносит лайки из Post.liked в Like: строка Like остается только
+    для пары (user, post), которая лайкнута в одной из таблиц.
+    """
+    Post = apps.get_model('posts', 'Post')
+    Like = apps.get_model('posts', 'Like')
+    Liked = Post.liked.through
+
+    Like.objects.filter(value='Не нравится').delete()
+    keep = (
+        Like.objects.order_by().values('user', 'post')
+        .annotate(keep=Min('pk')).values('keep')
+    )
+    Like.objects.exclude(pk__in=keep).delete()
+
+    existing = set(Like.objects.values_list('user_id', 'post_id'))
+    missing = []
+    for user_id, post_id in Liked.objects.values_list(
+            'user_id', 'post_id').iterator():
+        if (user_id, post_id) not in existing:
+            missing.append(Like(user_id=user_id, post_id=post_id))
+    Like.objects.bulk_create(missing, batch_size=BATCH_SIZE)
+
+    Post.objects.update(likes_count=Coalesce(Subquery(
+        Like.objects.filter(post=OuterRef('pk')).order_by()
+        .values('post').annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField()
+    ), 0))
+
+
+def split_likes(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Like = apps.get_model('posts', 'Like')
+    Post.liked.through.objects.bulk_create(
+        (Post.liked.through(user_id=user_id, post_id=post_id)
+         for user_id, post_id in Like.objects.values_list(
+             'user_id', 'post_id')),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0005_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='like',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата лайка'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(merge_likes, split_likes),
+        migrations.RemoveField(
+            model_name='like',
+            name='value',
+        ),
+        migrations.AlterUniqueTogether(
+            name='like',
+            unique_together={('user', 'post')},
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='liked',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='liked',
+            field=models.ManyToManyField(blank=True, related_name='liked_by', through='posts.Like', to=settings.AUTH_USER_MODEL, verbose_name='Лайкнули'),
+        ),
+    ]
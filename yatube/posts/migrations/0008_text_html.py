@@ -0,0 +1,74 @@
+# Generated by Django 2.2.16 on 2026-10-18 15:23
+
+import hashlib
+import json
+
+import markdown
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+# settings.MARKDOWN_EXTENSIONS на момент миграции.
+MARKDOWN_EXTENSIONS = ['markdown.extensions.fenced_code']
+
+
+def markup_version():
+    """posts.markup.markup_version() на момент миграции."""
+    key = json.dumps([MARKDOWN_EXTENSIONS, markdown.__version__])
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def render_markdown(text):
+    return markdown.markdown(text or '', extensions=MARKDOWN_EXTENSIONS)
+
+
+def render_existing(apps, schema_editor):
+    """
+    Отрисовывает сохраненные тексты. Если расширения в настройках
+    потом изменятся, версия не совпадет и HTML перерисует команда
+    render_markdown.
+    """
+    version = markup_version()
+    for name in ('Post', 'Comment'):
+        model = apps.get_model('posts', name)
+        batch = []
+        for obj in model.objects.only('pk', 'text').iterator():
+            obj.text_html = render_markdown(obj.text)
+            obj.html_version = version
+            batch.append(obj)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(
+                    batch, ['text_html', 'html_version']
+                )
+                batch = []
+        model.objects.bulk_update(batch, ['text_html', 'html_version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='html_version',
+            field=models.CharField(blank=True, editable=False, max_length=12, verbose_name='Версия отрисовки HTML'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст комментария в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='html_version',
+            field=models.CharField(blank=True, editable=False, max_length=12, verbose_name='Версия отрисовки HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст поста в HTML'),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,145 @@
+# Generated by Django 2.2.16 on 2026-10-18 15:25
+
+import hashlib
+import json
+from html.parser import HTMLParser
+
+import markdown
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+# settings.MARKDOWN_EXTENSIONS и POST_EXCERPT_LENGTH на момент миграции.
+MARKDOWN_EXTENSIONS = ['markdown.extensions.fenced_code']
+POST_EXCERPT_LENGTH = 600
+
+
+def version(*parts):
+    """posts.markup.markup_version() из указанных частей ключа."""
+    key = json.dumps([MARKDOWN_EXTENSIONS, markdown.__version__, *parts])
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+# Элементы без закрывающего тега.
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'source', 'track', 'wbr',
+}
+
+
+class ExcerptParser(HTMLParser):
+    """
+    Копирует HTML, пока не наберет limit символов текста, после чего
+    ставит многоточие и закрывает оставшиеся открытыми теги.
+    """
+
+    def __init__(self, limit):
+        super().__init__(convert_charrefs=False)
+        self.limit = limit
+        self.length = 0
+        self.parts = []
+        self.open_tags = []
+        self.truncated = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.truncated:
+            return
+        self.parts.append(self.get_starttag_text())
+        if tag not in VOID_ELEMENTS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.truncated:
+            self.parts.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if self.truncated or tag not in self.open_tags:
+            return
+        while self.open_tags:
+            opened = self.open_tags.pop()
+            self.parts.append(f'</{opened}>')
+            if opened == tag:
+                break
+
+    def handle_data(self, data):
+        if self.truncated:
+            return
+        if not data.strip():
+            self.parts.append(data)
+            return
+        rest = self.limit - self.length
+        if len(data) <= rest:
+            self.parts.append(data)
+            self.length += len(data)
+            return
+        cut = data[:rest]
+        if not data[rest].isspace():
+            # Недописанное слово отбрасывается целиком.
+            cut = cut.rsplit(' ', 1)[0] if ' ' in cut else ''
+        self.parts.append(cut.rstrip() + '…')
+        self.truncated = True
+
+    def add_char(self, text):
+        if self.truncated:
+            return
+        if self.length >= self.limit:
+            self.parts.append('…')
+            self.truncated = True
+            return
+        self.parts.append(text)
+        self.length += 1
+
+    def handle_entityref(self, name):
+        self.add_char(f'&{name};')
+
+    def handle_charref(self, name):
+        self.add_char(f'&#{name};')
+
+    def excerpt(self):
+        closing = ''.join(f'</{tag}>' for tag in reversed(self.open_tags))
+        return ''.join(self.parts) + closing
+
+
+def make_excerpt(html):
+    parser = ExcerptParser(POST_EXCERPT_LENGTH)
+    parser.feed(html)
+    parser.close()
+    return parser.excerpt()
+
+
+def fill_excerpts(apps, schema_editor):
+    """
+    Строит отрывки из уже сохраненного HTML. Записи, отрисованные
+    в 0008, получают версию, в которую входит длина отрывка, без
+    перерисовки.
+    """
+    previous, current = version(), version(POST_EXCERPT_LENGTH)
+    for name in ('Post', 'Comment'):
+        model = apps.get_model('posts', name)
+        model.objects.filter(html_version=previous).update(
+            html_version=current
+        )
+    Post = apps.get_model('posts', 'Post')
+    batch = []
+    for post in Post.objects.only('pk', 'text_html').iterator():
+        post.text_excerpt = make_excerpt(post.text_html)
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            Post.objects.bulk_update(batch, ['text_excerpt'])
+            batch = []
+    Post.objects.bulk_update(batch, ['text_excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='text_excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Отрывок поста для ленты'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
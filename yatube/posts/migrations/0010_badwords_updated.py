@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_text_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='badwords',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменено'),
+        ),
+    ]
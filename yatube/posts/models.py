@@ -4,6 +4,30 @@ from django.db import models
 
 User = get_user_model()
 
+PUBLISHED = 'published'
+PENDING = 'pending'
+REJECTED = 'rejected'
+MODERATION_CHOICES = (
+    (PUBLISHED, 'Опубликовано'),
+    (PENDING, 'На модерации'),
+    (REJECTED, 'Отклонено'),
+)
+
+
+class ModeratedQuerySet(models.QuerySet):
+    def published(self):
+        """Только записи, прошедшие модерацию."""
+        return self.filter(status=PUBLISHED)
+
+
+class PostQuerySet(ModeratedQuerySet):
+    def for_feed(self):
+        """
+        Посты для карточек ленты: полный текст и его HTML не читаются,
+        карточке достаточно сохраненного отрывка.
+        """
+        return self.defer('text', 'text_html')
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -41,6 +65,22 @@ class Post(models.Model):
         verbose_name='Текст поста',
         help_text='Текст нового поста',
     )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст поста в HTML',
+    )
+    text_excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Отрывок поста для ленты',
+    )
+    html_version = models.CharField(
+        max_length=12,
+        blank=True,
+        editable=False,
+        verbose_name='Версия отрисовки HTML',
+    )
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
@@ -71,14 +111,41 @@ class Post(models.Model):
     )
     liked = models.ManyToManyField(
         User,
-        default=None,
+        through='Like',
         blank=True,
         verbose_name='Лайкнули',
         related_name='liked_by',
     )
+    status = models.CharField(
+        choices=MODERATION_CHOICES,
+        default=PUBLISHED,
+        max_length=10,
+        db_index=True,
+        verbose_name='Статус модерации',
+    )
+    likes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Лайков',
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментариев',
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['status', 'pub_date'],
+                         name='post_status_pub_date_idx'),
+            models.Index(fields=['author', 'status', 'pub_date'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', 'status', 'pub_date'],
+                         name='post_group_pub_date_idx'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -87,7 +154,7 @@ class Post(models.Model):
 
     @property
     def num_likes(self):
-        return self.liked.all().count()
+        return self.likes_count
 
 
 class Comment(models.Model):
@@ -110,13 +177,37 @@ class Comment(models.Model):
         verbose_name='Текст комментария',
         help_text='Введите текст комментария'
     )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст комментария в HTML',
+    )
+    html_version = models.CharField(
+        max_length=12,
+        blank=True,
+        editable=False,
+        verbose_name='Версия отрисовки HTML',
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата публикации комментария'
     )
+    status = models.CharField(
+        choices=MODERATION_CHOICES,
+        default=PUBLISHED,
+        max_length=10,
+        db_index=True,
+        verbose_name='Статус модерации',
+    )
+
+    objects = ModeratedQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['post', 'status', 'pub_date'],
+                         name='comment_post_pub_date_idx'),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -141,14 +232,69 @@ class Follow(models.Model):
     )
 
     class Meta:
+        unique_together = ('user', 'author')
         verbose_name = 'Подписка',
         verbose_name_plural = 'Подписки'
 
 
-LIKE_CHOICES = (
-    ('Нравится', 'Нравится'),
-    ('Не нравится', 'Не нравится'),
-)
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок',
+    )
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        ordering = ['-pub_date', '-post_id']
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Ленты подписок'
+
+    def __str__(self):
+        return f'{self.user} - {self.post}'
 
 
 class Like(models.Model):
@@ -164,14 +310,17 @@ class Like(models.Model):
         verbose_name='Пост',
         related_name='liking',
     )
-    value = models.CharField(
-        choices=LIKE_CHOICES,
-        default='Нравится',
-        max_length=11,
-        verbose_name='Значение',
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата лайка',
     )
 
     class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', 'created'],
+                         name='like_user_created_idx'),
+        ]
         verbose_name = 'Лайк',
         verbose_name_plural = 'Лайки'
 
@@ -186,8 +335,49 @@ class BadWords(models.Model):
         verbose_name='"Плохие" слова',
         help_text='Введите новое фильтруемое слово'
     )
+    # По числу слов и времени последней правки процессы замечают
+    # изменение словаря.
+    updated = models.DateTimeField(auto_now=True, verbose_name='Изменено')
 
     class Meta:
         verbose_name = '"Плохое" слово',
         verbose_name_plural = '"Плохие" слова'
 
+
+class Violation(models.Model):
+    POST = 'post'
+    COMMENT = 'comment'
+    MODEL_CHOICES = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    model = models.CharField(
+        choices=MODEL_CHOICES,
+        max_length=10,
+        verbose_name='Тип записи',
+    )
+    object_id = models.PositiveIntegerField(
+        verbose_name='ID записи',
+    )
+    field = models.CharField(
+        max_length=20,
+        verbose_name='Поле',
+    )
+    words = models.CharField(
+        max_length=255,
+        verbose_name='Найденные слова',
+    )
+    found_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата проверки',
+    )
+
+    class Meta:
+        ordering = ['-found_at']
+        unique_together = ('model', 'object_id', 'field')
+        verbose_name = 'Нарушение'
+        verbose_name_plural = 'Нарушения'
+
+    def __str__(self):
+        return f'{self.model} #{self.object_id}: {self.words}'
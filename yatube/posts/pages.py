@@ -0,0 +1,68 @@
+from core.pagecache import forget_pages
+
+from .models import Comment, Post
+
+# Главная лента: меняется с любым опубликованным постом.
+FEED_TAG = 'feed'
+
+
+def group_tag(pk):
+    return f'group:{pk}'
+
+
+def author_tag(pk):
+    return f'author:{pk}'
+
+
+def post_tag(pk):
+    return f'post:{pk}'
+
+
+def comments_tag(post_pk):
+    # Комментарии видны только на странице поста, не в карточках.
+    return f'comments:{post_pk}'
+
+
+def forget_post_pages(post_id, author_id, *group_ids):
+    """
+    Сбрасывает страницы, где пост показан или мог бы появиться:
+    главную, профиль автора, ленты групп и сам пост.
+    """
+    forget_pages(
+        FEED_TAG, author_tag(author_id), post_tag(post_id),
+        *[group_tag(pk) for pk in group_ids if pk is not None]
+    )
+
+
+def forget_group_pages(group_id):
+    """
+    Сбрасывает страницы с карточками постов группы, где показаны ее
+    название и ссылка: ленту группы, главную, профили авторов и
+    страницы самих постов.
+    """
+    posts = list(
+        Post.objects.filter(group_id=group_id).values_list('pk', 'author_id')
+    )
+    forget_pages(
+        FEED_TAG, group_tag(group_id),
+        *{author_tag(author_id) for _, author_id in posts},
+        *[post_tag(pk) for pk, _ in posts]
+    )
+
+
+def forget_author_pages(user_id):
+    """
+    Сбрасывает страницы, где показано имя пользователя: карточки его
+    постов во всех лентах, профиль и комментарии под постами.
+    """
+    post_ids = Post.objects.filter(author_id=user_id).values_list(
+        'pk', flat=True
+    )
+    commented = Comment.objects.filter(author_id=user_id).values_list(
+        'post_id', flat=True
+    ).distinct()
+    forget_pages(
+        FEED_TAG, author_tag(user_id),
+        *[post_tag(pk) for pk in post_ids],
+        *[comments_tag(pk) for pk in commented]
+    )
@@ -0,0 +1,203 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.paginator import Page, Paginator
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, values):
+    """Непрозрачный токен позиции в ленте: направление и значения ключа."""
+    values = [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps([direction, *values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_value(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and parse_datetime(value) is not None:
+        return parse_datetime(value)
+    raise ValueError(value)
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, *values = json.loads(raw.decode())
+        values = [decode_value(value) for value in values]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if direction not in (NEXT, PREVIOUS):
+        raise InvalidCursor(cursor)
+    return direction, values
+
+
+def ordering_key(item):
+    """Поле и направление одного элемента order_by()."""
+    if isinstance(item, str) and item != '?':
+        return item.lstrip('-'), item.startswith('-')
+    if isinstance(item, OrderBy) and isinstance(item.expression, F):
+        return item.expression.name, item.descending
+    raise ValueError(f'Курсор нельзя построить по сортировке {item!r}')
+
+
+def reverse_ordering(item):
+    if isinstance(item, str):
+        return item[1:] if item.startswith('-') else f'-{item}'
+    return item.copy().reverse_ordering()
+
+
+def page_window(page, size=2):
+    """
+    Номера страниц вокруг текущей, плюс первая и последняя.
+    None обозначает пропуск между ними.
+    """
+    last = page.paginator.num_pages
+    numbers = {1, last}
+    numbers.update(range(max(page.number - size, 1),
+                         min(page.number + size, last) + 1))
+    pages, previous = [], 0
+    for number in sorted(numbers):
+        if number - previous > 1:
+            pages.append(None)
+        pages.append(number)
+        previous = number
+    return pages
+
+
+class WindowPaginator(Paginator):
+    """
+    Нумерованная пагинация, которая берет общее число записей
+    из функции count (например, из кэша) вместо COUNT на каждый запрос.
+    """
+
+    def __init__(self, object_list, per_page, count=None):
+        super().__init__(object_list, per_page)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is None:
+            return super().count
+        return self._count()
+
+
+class CursorPage(Page):
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} objects>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(
+                NEXT, self.paginator.position(self.object_list[-1])
+            )
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(
+                PREVIOUS, self.paginator.position(self.object_list[0])
+            )
+
+
+class CursorPaginator(Paginator):
+    """
+    Пагинация по ключу без OFFSET и COUNT: страница выбирается условием
+    по ключу последней показанной записи, поэтому глубокие страницы
+    открываются так же быстро, как первая. Ключ - поля сортировки
+    object_list, по умолчанию (pub_date, id); последнее поле должно
+    быть уникальным.
+    """
+
+    default_ordering = ('-pub_date', '-pk')
+
+    def __init__(self, object_list, per_page):
+        self.ordering = (
+            tuple(object_list.query.order_by) or self.default_ordering
+        )
+        self.keys = [ordering_key(item) for item in self.ordering]
+        # Значения ключа читаются и сравниваются через аннотации: они
+        # берут уже присоединенные таблицы ленты (timeline, liking),
+        # а новый filter() по связи добавил бы еще один JOIN.
+        object_list = object_list.annotate(**{
+            self.alias(index): F(name)
+            for index, (name, _) in enumerate(self.keys)
+        }).order_by(*self.ordering)
+        super().__init__(object_list, per_page)
+
+    @staticmethod
+    def alias(index):
+        return f'cursor_{index}'
+
+    def position(self, obj):
+        return [getattr(obj, self.alias(index))
+                for index in range(len(self.keys))]
+
+    def after(self, values, reverse=False):
+        """Условие "запись дальше values в порядке ленты"."""
+        condition, equal = Q(), {}
+        for index, ((_, descending), value) in enumerate(
+                zip(self.keys, values)):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{
+                f'{self.alias(index)}__{lookup}': value
+            })
+            equal[self.alias(index)] = value
+        return condition
+
+    def get_page(self, cursor):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def page(self, cursor):
+        queryset = self.object_list
+        direction, position = NEXT, None
+        if cursor:
+            direction, position = decode_cursor(cursor)
+            if len(position) != len(self.keys):
+                raise InvalidCursor(cursor)
+        if position and direction == NEXT:
+            queryset = queryset.filter(self.after(position))
+        elif position:
+            queryset = queryset.filter(
+                self.after(position, reverse=True)
+            ).order_by(*[reverse_ordering(item) for item in self.ordering])
+
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if direction == PREVIOUS:
+            items.reverse()
+            return CursorPage(items, self, True, has_more)
+        return CursorPage(items, self, has_more, position is not None)
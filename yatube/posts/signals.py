@@ -0,0 +1,198 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+
+from core.pagecache import forget_pages
+
+from .badwords import forget_version
+from .counts import (forget_liked_counts, forget_post_counts,
+                     forget_reader_counts)
+from .likes import apply_likes
+from .markup import render_text
+from .models import (PUBLISHED, BadWords, Comment, Follow, Group, Post,
+                     User)
+from .pages import (author_tag, comments_tag, forget_author_pages,
+                    forget_group_pages, forget_post_pages)
+from .stats import change_post_counters, change_user_stats, reconcile_users
+from .timeline import backfill, fan_out, forget_timeline_counts, prune
+
+
+@receiver(post_save, sender=BadWords)
+@receiver(post_delete, sender=BadWords)
+def badwords_changed(sender, **kwargs):
+    """
+    Сбрасывает версию словаря, чтобы правка действовала сразу.
+    Повторный сброс после коммита не дает процессу, прочитавшему
+    версию до коммита, оставить ее у себя.
+    """
+    forget_version()
+    transaction.on_commit(forget_version)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_state(sender, instance, **kwargs):
+    # Через __dict__, чтобы не загружать отложенные поля лишним запросом.
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+    instance._loaded_status = instance.__dict__.get('status')
+    instance._loaded_text = instance.__dict__.get('text')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    """
+    Сбрасывает счетчики и страницы лент, включая ленту прежней
+    группы поста.
+    """
+    loaded_group_id = getattr(instance, '_loaded_group_id', None)
+    forget_post_counts(
+        instance.author_id, instance.group_id, loaded_group_id
+    )
+    forget_post_pages(
+        instance.pk, instance.author_id, instance.group_id, loaded_group_id
+    )
+    instance._loaded_group_id = instance.group_id
+
+
+def publication_delta(instance, created):
+    """+1, если запись стала опубликованной, -1, если перестала."""
+    loaded_status = getattr(instance, '_loaded_status', None)
+    was_published = not created and loaded_status == PUBLISHED
+    instance._loaded_status = instance.status
+    return (instance.status == PUBLISHED) - was_published
+
+
+@receiver(post_save, sender=Post)
+def post_published(sender, instance, created, **kwargs):
+    """Раскладывает только что опубликованный пост по лентам подписок."""
+    delta = publication_delta(instance, created)
+    if delta > 0:
+        fan_out(instance)
+    if delta:
+        change_user_stats(instance.author_id, posts_count=delta)
+        forget_reader_counts(instance.pk, instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    if instance.status == PUBLISHED:
+        change_user_stats(instance.author_id, posts_count=-1)
+
+
+@receiver(post_init, sender=Comment)
+def remember_comment_state(sender, instance, **kwargs):
+    instance._loaded_status = instance.__dict__.get('status')
+    instance._loaded_text = instance.__dict__.get('text')
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def text_saving(sender, instance, update_fields=None, **kwargs):
+    """Отрисовывает Markdown один раз при сохранении нового текста."""
+    if update_fields is None or 'text' in update_fields:
+        render_text(instance)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    if instance.post_id:
+        forget_pages(comments_tag(instance.post_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # До удаления: SET_NULL отвяжет посты группы без сигналов.
+    forget_group_pages(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    delta = publication_delta(instance, created)
+    if delta and instance.post_id:
+        change_post_counters([instance.post_id], comments_count=delta)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.status == PUBLISHED and instance.post_id:
+        change_post_counters([instance.post_id], comments_count=-1)
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        reconcile_users(User.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=User)
+def user_renamed(sender, instance, created, **kwargs):
+    """Новое имя должно появиться во всех закэшированных карточках."""
+    if not created and instance.username != instance._loaded_username:
+        forget_author_pages(instance.pk)
+    instance._loaded_username = instance.username
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        backfill(instance.user_id, instance.author_id)
+        change_user_stats(instance.user_id, following_count=1)
+        change_user_stats(instance.author_id, followers_count=1)
+        forget_pages(author_tag(instance.user_id),
+                     author_tag(instance.author_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    prune(instance.user_id, instance.author_id)
+    change_user_stats(instance.user_id, following_count=-1)
+    change_user_stats(instance.author_id, followers_count=-1)
+    forget_pages(author_tag(instance.user_id), author_tag(instance.author_id))
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    forget_liked_counts(instance.liked.values_list('pk', flat=True))
+    forget_timeline_counts(instance.pk)
+
+
+def existing_likes(sender, instance, reverse, pk_set):
+    """Пары (post_id, user_id), которые будут удалены из лайков."""
+    links = sender.objects.filter(**{'user' if reverse else 'post': instance})
+    if pk_set is not None:
+        field = 'post__in' if reverse else 'user__in'
+        links = links.filter(**{field: pk_set})
+    return list(links.values_list('post_id', 'user_id'))
+
+
+@receiver(m2m_changed, sender=Post.liked.through)
+def likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Перед удалением запоминает реально существующие лайки, чтобы
+    счетчики уменьшились ровно на них, а после изменения обновляет
+    likes_count и сбрасывает счетчики ленты лайков.
+    """
+    if action in ('pre_remove', 'pre_clear'):
+        instance._removed_likes = existing_likes(
+            sender, instance, reverse, pk_set
+        )
+        return
+    if action == 'post_add':
+        links = [(pk, instance.pk) if reverse else (instance.pk, pk)
+                 for pk in pk_set]
+        delta = 1
+    elif action in ('post_remove', 'post_clear'):
+        links = getattr(instance, '_removed_likes', [])
+        delta = -1
+    else:
+        return
+    if links:
+        apply_likes(links, delta, instance.pk if reverse else None)
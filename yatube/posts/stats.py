@@ -0,0 +1,61 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import PUBLISHED, Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field):
+    """Подзапрос COUNT по field = OuterRef('pk') для UPDATE."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by()
+        .values(field).annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def change_post_counters(post_ids, **deltas):
+    """Атомарно меняет счетчики постов: likes_count=+1 и т.п."""
+    Post.objects.filter(pk__in=post_ids).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def change_user_stats(user_id, **deltas):
+    """
+    Атомарно меняет счетчики пользователя. Недостающая строка создается
+    только при увеличении: при удалении пользователя каскад убирает ее
+    раньше его постов и подписок, и воссоздавать ее нельзя.
+    """
+    updated = UserStats.objects.filter(user_id=user_id).update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+    if not updated and all(delta > 0 for delta in deltas.values()):
+        reconcile_users(User.objects.filter(pk=user_id))
+
+
+def reconcile_posts(posts=None):
+    """Пересчитывает счетчики лайков и комментариев по данным таблиц."""
+    posts = Post.objects.all() if posts is None else posts
+    return posts.update(
+        likes_count=_count(Post.liked.through.objects.all(), 'post'),
+        comments_count=_count(
+            Comment.objects.filter(status=PUBLISHED), 'post'
+        ),
+    )
+
+
+def reconcile_users(users=None):
+    """Создает недостающие строки UserStats и пересчитывает их."""
+    users = User.objects.all() if users is None else users
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk)
+         for pk in users.filter(stats__isnull=True).values_list(
+             'pk', flat=True)),
+        ignore_conflicts=True,
+    )
+    return UserStats.objects.filter(user__in=users).update(
+        posts_count=_count(Post.objects.published(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
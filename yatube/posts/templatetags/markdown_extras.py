@@ -1,7 +1,7 @@
 from django import template
 from django.template.defaultfilters import stringfilter
 
-import markdown as md
+from ..markup import render_markdown
 
 register = template.Library()
 
@@ -9,4 +9,4 @@ register = template.Library()
 @register.filter()
 @stringfilter
 def markdown(value):
-    return md.markdown(value, extensions=['markdown.extensions.fenced_code'])
\ No newline at end of file
+    return render_markdown(value)
@@ -0,0 +1,10 @@
+from django import template
+
+from ..pagination import page_window as get_page_window
+
+register = template.Library()
+
+
+@register.filter()
+def page_window(page, size=2):
+    return get_page_window(page, size)
@@ -0,0 +1,223 @@
+import random
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from .. import badwords
+from ..badwords import (BAD_WORDS_VERSION_KEY, BadWordsMatcher, VerdictCache,
+                        bounded_levenshtein, get_matcher, get_version,
+                        levenshtein_distance)
+from ..forms import FilterBadWords, PostForm
+from ..management.commands.bench_badwords import naive_find
+from ..models import BadWords
+
+
+NORMALIZATION_CORPUS = (
+    '',
+    'обычный текст без замен',
+    'аr6уz',
+    'молиnа',
+    '@пельсин',
+    'kiwi',
+    'm@нг0',
+    '3а6op',
+    'r0p0d',
+    'c0bpeменный tekct',
+    'hello, world!',
+    '123 456 7890',
+    'ёжик в тумане',
+    'random text',
+    'b@b@ v@ly@',
+    'ф0т0 f0t0 ф0t0',
+    'Смешанный Text С ЗАГЛАВНЫМИ',
+    '*@*@ @p',
+    'эхо exo ex0',
+)
+
+MULTI_CHAR_CASES = {
+    '}{ороший': 'хороший',
+    '][ороший': 'хороший',
+    '|{иви': 'киви',
+    'i{иви': 'киви',
+    'schука': 'щука',
+    'shило': 'шило',
+    'zhук': 'жук',
+    'chай': 'чай',
+    'yabлoko': 'яблоко',
+    'te}{t': 'техт',
+    'yandex': 'яндех',
+    'u,@p': 'цап',
+}
+
+
+def legacy_comparison(input_dict, input_phrase):
+    """Прежний FilterBadWords.comparison."""
+    for key, value in input_dict.items():
+        for letter in value:
+            for symbol in input_phrase:
+                if letter == symbol:
+                    input_phrase = input_phrase.replace(symbol, key)
+    return input_phrase
+
+
+class NormalizerTest(TestCase):
+    def test_normalizer_matches_legacy_comparison(self):
+        """Одиночные замены совпадают с прежним comparison."""
+        filter_words = FilterBadWords()
+        for phrase in NORMALIZATION_CORPUS:
+            with self.subTest(phrase=phrase):
+                self.assertEqual(
+                    filter_words.comparison(phrase),
+                    legacy_comparison(FilterBadWords.mydict, phrase)
+                )
+
+    def test_normalizer_replaces_sequences(self):
+        """Многосимвольные замены берутся по самому длинному совпадению."""
+        filter_words = FilterBadWords()
+        for phrase, expected in MULTI_CHAR_CASES.items():
+            with self.subTest(phrase=phrase):
+                self.assertEqual(filter_words.comparison(phrase), expected)
+
+
+class BoundedLevenshteinTest(TestCase):
+    def test_bounded_equals_full_distance(self):
+        """Расстояние с порогом совпадает с полным в пределах порога."""
+        rnd = random.Random(7)
+        for _ in range(500):
+            first = ''.join(
+                rnd.choice('абв') for _ in range(rnd.randint(0, 8))
+            )
+            second = ''.join(
+                rnd.choice('абв') for _ in range(rnd.randint(0, 8))
+            )
+            limit = rnd.randint(0, 4)
+            distance = levenshtein_distance(first, second)
+            with self.subTest(first=first, second=second, limit=limit):
+                self.assertEqual(
+                    bounded_levenshtein(first, second, limit),
+                    min(distance, limit + 1)
+                )
+
+
+class BadWordsMatcherTest(TestCase):
+    def test_matcher_equals_naive_filter(self):
+        """Результаты BadWordsMatcher совпадают с прежним алгоритмом."""
+        rnd = random.Random(42)
+        alphabet = 'абвгд'
+        for _ in range(300):
+            bad_words = {
+                ''.join(rnd.choice(alphabet)
+                        for _ in range(rnd.randint(1, 9)))
+                for _ in range(rnd.randint(1, 6))
+            }
+            phrase = ''.join(
+                rnd.choice(alphabet) for _ in range(rnd.randint(0, 30))
+            )
+            with self.subTest(phrase=phrase, bad_words=bad_words):
+                self.assertEqual(
+                    BadWordsMatcher(bad_words).find(phrase),
+                    naive_find(phrase, bad_words)
+                )
+
+    def test_matcher_finds_distorted_words(self):
+        """Слово находится с опечатками, в конце фразы и внутри текста."""
+        matcher = BadWordsMatcher(['арбуз', 'малина', 'киви'])
+        self.assertEqual(matcher.find('сладкийарбус'), {'арбуз'})
+        self.assertEqual(matcher.find('молина'), {'малина'})
+        self.assertEqual(matcher.find('кивиарбуз'), {'киви', 'арбуз'})
+        self.assertEqual(matcher.find('кив'), {'киви'})
+        self.assertEqual(matcher.find('ки'), set())
+        self.assertEqual(matcher.find(''), set())
+
+
+class FilterBadWordsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        BadWords.objects.create(word='арбуз')
+
+    def test_filter_rejects_disguised_word(self):
+        """Замаскированное слово не проходит фильтр."""
+        form = PostForm(data={'title': 'Заголовок', 'text': 'аr6уz'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('text', form.errors)
+
+    def test_filter_returns_raw_phrase(self):
+        """Чистая фраза возвращается без изменений."""
+        phrase = 'Обычный Текст'
+        self.assertEqual(FilterBadWords().start_filtering(phrase), phrase)
+
+
+class BadWordsCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_dictionary_is_not_queried_on_every_validation(self):
+        """Повторная проверка не обращается к таблице BadWords."""
+        BadWords.objects.create(word='манго')
+        FilterBadWords().start_filtering('текст')
+        with self.assertNumQueries(0):
+            form = PostForm(data={'title': 'манго', 'text': 'текст'})
+            self.assertFalse(form.is_valid())
+
+    def test_dictionary_changes_are_picked_up(self):
+        """Добавление и удаление слова сразу меняют работу фильтра."""
+        FilterBadWords().start_filtering('груша')
+        word = BadWords.objects.create(word='груша')
+        with self.assertRaises(ValidationError):
+            FilterBadWords().start_filtering('груша')
+        word.delete()
+        self.assertEqual(FilterBadWords().start_filtering('груша'), 'груша')
+
+    def test_workers_share_words_through_cache(self):
+        """Другой процесс берет словарь из общего кэша, а не из базы."""
+        BadWords.objects.create(word='яблоко')
+        get_matcher()
+        badwords._compiled = (None, None)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_matcher().words, ['яблоко'])
+
+    def test_other_workers_see_changes_after_timeout(self):
+        """
+        Процесс со своим кэшем не видит сброса версии, но замечает
+        правку, когда версия в его кэше истекает.
+        """
+        word = BadWords.objects.create(word='слива')
+        stale = get_version()
+        self.assertEqual(get_matcher().words, ['слива'])
+        word.word = 'вишня'
+        word.save()
+        cache.set(BAD_WORDS_VERSION_KEY, stale)
+        self.assertEqual(get_matcher().words, ['слива'])
+        cache.delete(BAD_WORDS_VERSION_KEY)
+        self.assertEqual(get_matcher().words, ['вишня'])
+
+
+class VerdictCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.verdicts = VerdictCache(size=2)
+        self.matcher = BadWordsMatcher(['киви'], version=1)
+
+    def test_repeated_phrase_is_not_rescanned(self):
+        """Повторная фраза берется из кэша процесса."""
+        self.assertEqual(self.verdicts.find('кивиok', self.matcher), {'киви'})
+        self.matcher.find = None
+        self.assertEqual(self.verdicts.find('кивиok', self.matcher), {'киви'})
+        self.assertEqual(self.verdicts.stats()['local_hits'], 1)
+        self.assertEqual(self.verdicts.stats()['misses'], 1)
+
+    def test_shared_cache_and_version(self):
+        """Другой процесс берет ответ из общего кэша, новая версия — нет."""
+        self.verdicts.find('текст', self.matcher)
+        other = VerdictCache()
+        other.find('текст', self.matcher)
+        self.assertEqual(other.stats()['shared_hits'], 1)
+        other.find('текст', BadWordsMatcher(['киви'], version=2))
+        self.assertEqual(other.stats()['misses'], 1)
+
+    def test_local_cache_is_bounded(self):
+        """Кэш процесса не растет больше заданного размера."""
+        for phrase in ('один', 'два', 'три'):
+            self.verdicts.find(phrase, self.matcher)
+        self.assertEqual(len(self.verdicts._local), 2)
@@ -0,0 +1,237 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.pagecache import TAG_KEY
+
+from ..badwords import get_version
+from ..models import (PENDING, PUBLISHED, REJECTED, BadWords, Comment,
+                      Follow, Post, TimelineEntry, User, Violation)
+from ..pages import author_tag, post_tag
+
+
+class RemoderateCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Author')
+        cls.clean_post = Post.objects.create(
+            title='Заголовок', text='Чистый текст', author=cls.user
+        )
+        cls.bad_post = Post.objects.create(
+            title='Про ар6уз', text='Текст', author=cls.user
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.clean_post, author=cls.user, text='Сладкий арбуз'
+        )
+
+    def setUp(self):
+        cache.clear()
+        BadWords.objects.create(word='арбуз')
+
+    def remoderate(self, *args):
+        out = StringIO()
+        call_command('remoderate', '--chunk-size', '1', *args, stdout=out)
+        return out.getvalue()
+
+    def test_command_flags_existing_content(self):
+        """Команда находит нарушения в старых постах и комментариях."""
+        output = self.remoderate('--workers', '1')
+        self.assertEqual(
+            set(Violation.objects.values_list('model', 'object_id', 'field')),
+            {
+                (Violation.POST, self.bad_post.pk, 'title'),
+                (Violation.COMMENT, self.comment.pk, 'text'),
+            }
+        )
+        self.assertIn('записей/с', output)
+
+    def test_command_rerun_does_not_duplicate(self):
+        """Повторный запуск не создает дубликатов нарушений."""
+        self.remoderate('--workers', '1')
+        self.remoderate('--workers', '1')
+        self.assertEqual(Violation.objects.count(), 2)
+
+    def test_command_resumes_from_checkpoint(self):
+        """Команда продолжает работу с последнего обработанного pk."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint.json')
+            with open(path, 'w') as file:
+                json.dump({'version': get_version(),
+                           Violation.POST: self.bad_post.pk}, file)
+            self.remoderate('--workers', '1', '--checkpoint', path)
+            # После полного прохода прогресс забывается.
+            self.assertFalse(os.path.exists(path))
+        self.assertFalse(
+            Violation.objects.filter(model=Violation.POST).exists()
+        )
+        self.assertTrue(
+            Violation.objects.filter(model=Violation.COMMENT).exists()
+        )
+
+    def test_command_restarts_after_dictionary_change(self):
+        """Checkpoint другой версии словаря не пропускает старые записи."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint.json')
+            with open(path, 'w') as file:
+                json.dump({'version': 'old',
+                           Violation.POST: self.bad_post.pk}, file)
+            self.remoderate('--workers', '1', '--checkpoint', path)
+        self.assertTrue(Violation.objects.filter(
+            model=Violation.POST, object_id=self.bad_post.pk
+        ).exists())
+
+
+@override_settings(ASYNC_MODERATION=True)
+class ModerateCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Author')
+
+    def setUp(self):
+        cache.clear()
+        BadWords.objects.create(word='арбуз')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_post_is_saved_pending_and_hidden(self):
+        """Новый пост сохраняется без проверки и скрыт из ленты."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'title': 'Заголовок', 'text': 'Про арбуз'}
+        )
+        post = Post.objects.get()
+        self.assertEqual(post.status, PENDING)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotIn(post, response.context['page_obj'])
+
+    def test_moderate_publishes_and_rejects(self):
+        """Команда moderate публикует чистые записи и отклоняет плохие."""
+        clean = Post.objects.create(
+            title='Заголовок', text='Текст', author=self.user, status=PENDING
+        )
+        bad = Post.objects.create(
+            title='Заголовок', text='Про арбуз', author=self.user,
+            status=PENDING
+        )
+        comment = Comment.objects.create(
+            post=clean, author=self.user, text='арбуз', status=PENDING
+        )
+        call_command('moderate', stdout=StringIO())
+        clean.refresh_from_db()
+        bad.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertEqual(clean.status, PUBLISHED)
+        self.assertEqual(bad.status, REJECTED)
+        self.assertEqual(comment.status, REJECTED)
+        self.assertTrue(Violation.objects.filter(
+            model=Violation.POST, object_id=bad.pk, field='text'
+        ).exists())
+        self.user.stats.refresh_from_db()
+        self.assertEqual(self.user.stats.posts_count, 1)
+        self.assertEqual(clean.comments_count, 0)
+
+    def test_reject_forgets_post_pages(self):
+        bad = Post.objects.create(
+            title='Заголовок', text='Про арбуз', author=self.user,
+            status=PENDING
+        )
+        cache.clear()
+        call_command('moderate', stdout=StringIO())
+        for tag in (post_tag(bad.pk), author_tag(self.user.pk)):
+            self.assertIsNotNone(cache.get(TAG_KEY.format(tag)))
+
+
+class TrimTimelinesCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        Post.objects.bulk_create(
+            Post(title=f'Пост {i}', text='Текст', author=cls.author)
+            for i in range(5)
+        )
+
+    def test_trim_keeps_newest_entries(self):
+        """Команда оставляет в ленте только последние записи."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(TimelineEntry.objects.count(), 5)
+        call_command('trim_timelines', '--length', '2', stdout=StringIO())
+        newest = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)[:2]
+        )
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('post_id', flat=True)),
+            newest
+        )
+
+
+class ReconcileCountersCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(
+            title='Заголовок', text='Текст', author=cls.author
+        )
+
+    def test_reconcile_restores_counters(self):
+        """Команда пересчитывает испорченные счетчики по таблицам."""
+        self.post.liked.add(self.reader)
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.update(likes_count=7, comments_count=3)
+        self.author.stats.delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 0)
+        stats = User.objects.get(pk=self.author.pk).stats
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+
+
+class RenderMarkdownCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(
+            title='Заголовок', text='**Жирный** текст', author=cls.user
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.user, text='`код`'
+        )
+
+    def test_text_is_rendered_on_save(self):
+        """HTML отрисовывается при сохранении и при изменении текста."""
+        self.assertEqual(
+            self.post.text_html, '<p><strong>Жирный</strong> текст</p>'
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>Новый текст</p>')
+
+    def test_command_rerenders_outdated_html(self):
+        """Команда заново отрисовывает только устаревший HTML."""
+        Post.objects.update(text_html='', text_excerpt='', html_version='old')
+        Comment.objects.update(text_html='')
+        out = StringIO()
+        call_command('render_markdown', '--workers', '1', stdout=out)
+        self.post.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual(
+            self.post.text_html, '<p><strong>Жирный</strong> текст</p>'
+        )
+        self.assertEqual(self.post.text_excerpt, self.post.text_html)
+        self.assertEqual(self.comment.text_html, '')
+        call_command('render_markdown', '--workers', '1', '--all',
+                     stdout=out)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.text_html, '<p><code>код</code></p>')
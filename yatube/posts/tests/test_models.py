@@ -1,8 +1,10 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..markup import make_excerpt
+from ..models import PENDING, PUBLISHED, Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -63,3 +65,103 @@ class PostModelTest(TestCase):
                     post._meta.get_field(field).help_text,
                     expected_value
                 )
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(
+            title='Заголовок', text='Текст', author=cls.author
+        )
+
+    def stats(self, user):
+        user.stats.refresh_from_db()
+        return user.stats
+
+    def test_likes_and_comments_are_counted(self):
+        """Лайки и опубликованные комментарии меняют счетчики поста."""
+        self.post.liked.add(self.reader, self.author)
+        self.post.liked.add(self.reader)
+        self.reader.liked_by.remove(self.post)
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='На модерации',
+            status=PENDING
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 1)
+        comment.delete()
+        self.post.liked.clear()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_posts_and_follows_are_counted(self):
+        """Публикации и подписки меняют счетчики пользователей."""
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        pending = Post.objects.create(
+            title='Заголовок', text='Текст', author=self.author,
+            status=PENDING
+        )
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        pending.status = PUBLISHED
+        pending.save()
+        self.assertEqual(self.stats(self.author).posts_count, 2)
+        pending.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_user_with_posts_and_follows_can_be_deleted(self):
+        """Каскад удаляет статистику раньше постов и подписок."""
+        other = User.objects.create_user(username='Other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=other)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        self.post.liked.add(self.reader)
+        self.author.delete()
+        connection.check_constraints()
+        self.assertFalse(User.objects.filter(username='Author').exists())
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        self.assertEqual(self.stats(other).followers_count, 0)
+
+
+class ExcerptTest(TestCase):
+    def test_short_html_is_unchanged(self):
+        html = '<p><strong>Жирный</strong> текст</p>'
+        self.assertEqual(make_excerpt(html, 100), html)
+
+    def test_excerpt_closes_open_tags(self):
+        """Отрывок обрезается по слову, а открытые теги закрываются."""
+        html = '<p>Первый <em>второй третий</em> четвертый</p><p>Еще</p>'
+        self.assertEqual(
+            make_excerpt(html, 14), '<p>Первый <em>второй…</em></p>'
+        )
+
+    def test_entities_count_as_one_char(self):
+        self.assertEqual(
+            make_excerpt('<p>a &amp; b &lt; c</p>', 3), '<p>a &amp;…</p>'
+        )
+
+    def test_excerpt_is_saved_with_post(self):
+        """Отрывок строится при сохранении поста."""
+        post = Post.objects.create(
+            author=User.objects.create_user(username='Author'),
+            title='Заголовок', text='слово ' * 300,
+        )
+        self.assertTrue(post.text_excerpt.endswith('…</p>'))
+        self.assertLessEqual(
+            len(post.text_excerpt), settings.POST_EXCERPT_LENGTH + 10
+        )
@@ -1,9 +1,12 @@
 from django.conf import settings
-from django.test import Client, TestCase
+from django.core.paginator import Paginator
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.cache import cache
 
-from ..models import Group, Post, User
+from ..counts import count_key
+from ..models import PENDING, Follow, Group, Post, User
+from ..pagination import page_window
 
 
 class PaginatorViewsTest(TestCase):
@@ -64,3 +67,146 @@ class PaginatorViewsTest(TestCase):
                              self.posts_on_first_page)
             self.assertEqual(len(response2.context['page_obj']),
                              self.posts_on_second_page)
+
+    @override_settings(PAGINATION_MODE='cursor')
+    def test_cursor_paginator_walks_feed_both_ways(self):
+        """Курсорная пагинация проходит ленту вперед и назад без пропусков."""
+        url = reverse(settings.INDEX)
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)
+        )
+        pages, cursor = [], ''
+        while True:
+            cache.clear()
+            page_obj = self.guest_client.get(
+                url, {'cursor': cursor}
+            ).context['page_obj']
+            pages.append(page_obj)
+            if not page_obj.has_next():
+                break
+            cursor = page_obj.next_cursor
+        self.assertEqual(
+            [post.pk for page_obj in pages for post in page_obj], expected
+        )
+        self.assertFalse(pages[0].has_previous())
+
+        cache.clear()
+        previous = self.guest_client.get(
+            url, {'cursor': pages[-1].previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(previous), list(pages[-2]))
+
+    def test_cursor_paginator_ignores_broken_cursor(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.guest_client.get(
+            reverse(settings.INDEX), {'cursor': 'не-курсор'}
+        )
+        self.assertEqual(len(response.context['page_obj']),
+                         self.posts_on_first_page)
+
+
+@override_settings(POSTS_PER_PAGE=2)
+class CursorOrderingTest(TestCase):
+    def test_cursor_keeps_view_ordering(self):
+        """Курсор сохраняет порядок ленты: избранное - по времени лайка."""
+        author = User.objects.create_user(username='Author')
+        reader = User.objects.create_user(username='Reader')
+        posts = [
+            Post.objects.create(title=f'Пост {i}', text='Текст',
+                                author=author)
+            for i in range(3)
+        ]
+        for post in (posts[0], posts[2], posts[1]):
+            post.liked.add(reader)
+        client = Client()
+        client.force_login(reader)
+        url = reverse('posts:users_liked_post')
+
+        def walk(param, start, advance):
+            found, value = [], start
+            while True:
+                cache.clear()
+                page_obj = client.get(url, {param: value}).context[
+                    'page_obj']
+                found += [post.pk for post in page_obj]
+                if not page_obj.has_next():
+                    return found
+                value = advance(page_obj)
+
+        by_page = walk('page', 1, lambda page_obj: page_obj.number + 1)
+        by_cursor = walk('cursor', '', lambda page_obj: page_obj.next_cursor)
+        self.assertEqual(by_page, [posts[1].pk, posts[2].pk, posts[0].pk])
+        self.assertEqual(by_cursor, by_page)
+
+
+class PageWindowTest(TestCase):
+    def test_page_window_is_bounded(self):
+        """Ссылки только вокруг текущей страницы, первая и последняя."""
+        pages = Paginator(range(100000), settings.POSTS_PER_PAGE)
+        self.assertEqual(
+            page_window(pages.page(500)),
+            [1, None, 498, 499, 500, 501, 502, None, 10000]
+        )
+        self.assertEqual(page_window(pages.page(1)), [1, 2, 3, None, 10000])
+        self.assertEqual(page_window(Paginator([1], 10).page(1)), [1])
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class CachedCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Author')
+        Post.objects.create(title='Заголовок', text='Текст', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_count_is_cached_and_refreshed(self):
+        """Число постов берется из кэша и сбрасывается при новом посте."""
+        url = reverse(settings.PROFILE, kwargs={'username': self.user})
+        self.guest_client.get(url)
+        key = count_key(f'author:{self.user.pk}')
+        self.assertEqual(cache.get(key), 1)
+        cache.set(key, 7)
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 7)
+        Post.objects.create(title='Второй', text='Текст', author=self.user)
+        self.assertIsNone(cache.get(key))
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+
+    def test_reader_counts_follow_post_status(self):
+        """Скрытый пост пропадает из счетчиков подписок и избранного."""
+        reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=self.user)
+        post = Post.objects.get()
+        post.liked.add(reader)
+        client = Client()
+        client.force_login(reader)
+        urls = [reverse('posts:follow_index'),
+                reverse('posts:users_liked_post')]
+        for url in urls:
+            response = client.get(url)
+            self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        post.status = PENDING
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count, 0
+                )
+
+    def test_deleted_post_leaves_follow_count(self):
+        reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=self.user)
+        client = Client()
+        client.force_login(reader)
+        url = reverse('posts:follow_index')
+        response = client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        Post.objects.get().delete()
+        response = client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 0)
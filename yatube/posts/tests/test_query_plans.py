@@ -0,0 +1,125 @@
+import re
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Like, Post, User
+from ..pagination import NEXT, encode_cursor
+
+FULL_SCAN = re.compile(
+    r'\bSCAN (TABLE )?(?!CONSTANT ROW|TABLE\b)\w+\b(?! USING)'
+)
+TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (ORDER BY|RIGHT PART OF ORDER)')
+
+
+class QueryPlanMixin:
+    """
+    Проверка планов запросов: каждый SELECT, выполненный при открытии
+    страницы, прогоняется через EXPLAIN QUERY PLAN, и тест падает,
+    если SQLite читает таблицу целиком или сортирует во временном
+    B-дереве.
+    """
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertQueriesUseIndexes(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            plan = self.explain(sql)
+            problems = [
+                step for step in plan
+                if FULL_SCAN.search(step) or TEMP_SORT.search(step)
+            ]
+            with self.subTest(url=url, sql=sql):
+                self.assertEqual(problems, [], '\n'.join(plan))
+
+
+class ViewQueryPlansTest(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            title='Заголовок', text='Текст', author=cls.author,
+            group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post.liked.add(cls.reader)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент и страницы поста идут по индексам без сортировки."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+            reverse('posts:follow_index'),
+            reverse('posts:users_liked_post'),
+        )
+        for url in urls:
+            self.assertQueriesUseIndexes(self.client, url)
+
+    def test_cursor_feed_queries_use_indexes(self):
+        """Курсорная пагинация тоже читает ленты по индексам."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        )
+        cursor = encode_cursor(NEXT, [self.post.pub_date, self.post.pk])
+        for url in urls:
+            self.assertQueriesUseIndexes(self.client, f'{url}?cursor=')
+            self.assertQueriesUseIndexes(
+                self.client, f'{url}?cursor={cursor}'
+            )
+        entry = self.reader.timeline.get()
+        like = Like.objects.get(user=self.reader)
+        cursors = {
+            reverse('posts:follow_index'):
+                encode_cursor(NEXT, [entry.pub_date, entry.post_id]),
+            reverse('posts:users_liked_post'):
+                encode_cursor(NEXT, [like.created, like.pk]),
+        }
+        for url, cursor in cursors.items():
+            self.assertQueriesUseIndexes(self.client, f'{url}?cursor=')
+            self.assertQueriesUseIndexes(
+                self.client, f'{url}?cursor={cursor}'
+            )
+
+    def test_plan_check_detects_full_scan(self):
+        """Проверка находит полный просмотр таблицы."""
+        plan = self.explain(
+            "SELECT id FROM posts_post WHERE text = 'x' ORDER BY title"
+        )
+        self.assertTrue(any(FULL_SCAN.search(step) for step in plan))
+        self.assertTrue(any(TEMP_SORT.search(step) for step in plan))
+
+    def test_plan_check_allows_index_scan(self):
+        """Просмотр по индексу полным не считается, в обоих форматах SQLite."""
+        for step in ('SCAN posts_post USING INDEX posts_post_pub_date',
+                     'SCAN TABLE posts_post USING COVERING INDEX idx',
+                     'SCAN CONSTANT ROW'):
+            with self.subTest(step=step):
+                self.assertIsNone(FULL_SCAN.search(step))
+        for step in ('SCAN posts_post', 'SCAN TABLE posts_post'):
+            with self.subTest(step=step):
+                self.assertIsNotNone(FULL_SCAN.search(step))
@@ -5,11 +5,13 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..forms import PostForm
-from ..models import Group, Post, Follow
+from ..models import Group, Post, Follow, Like, TimelineEntry
 
 User = get_user_model()
 
@@ -263,3 +265,79 @@ class PostViewsTest(TestCase):
         )
         self.assertNotContains(response_2, self.post)
         self.assertNotEqual(response_1, response_2)
+
+    def test_follow_feed_is_materialized_timeline(self):
+        """
+        Лента подписок заполняется при подписке и новых постах
+        и очищается при отписке
+        """
+        Follow.objects.create(user=self.user_no_author, author=self.user)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user_no_author, post=self.post).exists())
+        new_post = Post.objects.create(
+            title='Новый пост', text='Текст', author=self.user
+        )
+        response = self.authorized_client_no_author.get(
+            reverse(settings.FOLLOW_INDEX)
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), [new_post, self.post]
+        )
+        Follow.objects.filter(
+            user=self.user_no_author, author=self.user
+        ).delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.user_no_author).exists()
+        )
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_like_state_is_fetched_once_per_page(self):
+        """Состояние лайков страницы загружается без запроса на карточку."""
+        def index_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.authorized_client_no_author.get(
+                    reverse(settings.INDEX)
+                )
+            return response, len(queries)
+
+        self.post.liked.add(self.user_no_author)
+        response, single = index_queries()
+        self.assertTrue(response.context['page_obj'][0].is_liked)
+        posts = [
+            Post.objects.create(title='Пост', text='Текст', author=self.user)
+            for _ in range(5)
+        ]
+        for post in posts[:3]:
+            post.liked.add(self.user_no_author)
+        response, many = index_queries()
+        self.assertEqual(single, many)
+        self.assertEqual(
+            sum(post.is_liked for post in response.context['page_obj']), 4
+        )
+
+    def test_like_post_toggles_single_like(self):
+        """Повторный клик снимает лайк, автор не может лайкнуть свой пост."""
+        url = reverse('posts:like_post')
+        self.authorized_client_no_author.post(url, {'post_id': self.post.pk})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertTrue(Like.objects.filter(
+            user=self.user_no_author, post=self.post).exists())
+        self.authorized_client_no_author.post(url, {'post_id': self.post.pk})
+        self.authorized_client.post(url, {'post_id': self.post.pk})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertFalse(Like.objects.exists())
+
+    def test_like_post_json_returns_state(self):
+        """JSON-эндпоинт лайка отвечает новым состоянием и счетчиком."""
+        url = reverse('posts:like_post_json', args=(self.post.pk,))
+        response = self.authorized_client_no_author.post(url)
+        self.assertEqual(response.json(), {'liked': True, 'likes_count': 1})
+        response = self.authorized_client_no_author.post(url)
+        self.assertEqual(response.json(), {'liked': False, 'likes_count': 0})
+        response = self.authorized_client.post(url)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        response = self.authorized_client_no_author.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+
+from .counts import count_key
+from .models import Follow, Post, TimelineEntry
+
+
+def forget_follow_counts(user_ids):
+    cache.delete_many([count_key(f'follow:{pk}') for pk in user_ids])
+
+
+def forget_timeline_counts(post_id):
+    """
+    Сбрасывает счетчики лент, в которых лежит пост. Вызывается до
+    удаления поста: каскад уберет записи лент без сигналов.
+    """
+    forget_follow_counts(
+        TimelineEntry.objects.filter(post_id=post_id).values_list(
+            'user_id', flat=True
+        )
+    )
+
+
+def fan_out(post):
+    """Добавляет опубликованный пост в ленты подписчиков автора."""
+    followers = (
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+        .iterator(chunk_size=settings.TIMELINE_BATCH_SIZE)
+    )
+    batch = []
+    for user_id in followers:
+        batch.append(user_id)
+        if len(batch) == settings.TIMELINE_BATCH_SIZE:
+            _insert(post, batch)
+            batch = []
+    if batch:
+        _insert(post, batch)
+
+
+def _insert(post, user_ids):
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post.pk,
+                       pub_date=post.pub_date)
+         for user_id in user_ids),
+        ignore_conflicts=True,
+    )
+    forget_follow_counts(user_ids)
+
+
+def backfill(user_id, author_id):
+    """Переносит в ленту последние посты нового автора в подписках."""
+    posts = (
+        Post.objects.published().filter(author_id=author_id)
+        .values_list('pk', 'pub_date')[:settings.TIMELINE_LENGTH]
+    )
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+         for pk, pub_date in posts),
+        ignore_conflicts=True,
+    )
+    forget_follow_counts([user_id])
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    forget_follow_counts([user_id])
+
+
+def trim(user_id, length=None):
+    """Оставляет в ленте пользователя только length последних записей."""
+    length = length or settings.TIMELINE_LENGTH
+    oldest_kept = (
+        TimelineEntry.objects.filter(user_id=user_id)
+        .values_list('pub_date', 'post_id')[length - 1:length]
+    )
+    if not oldest_kept:
+        return 0
+    pub_date, post_id = oldest_kept[0]
+    deleted, _ = TimelineEntry.objects.filter(user_id=user_id).filter(
+        models.Q(pub_date__lt=pub_date)
+        | models.Q(pub_date=pub_date, post_id__lt=post_id)
+    ).delete()
+    if deleted:
+        forget_follow_counts([user_id])
+    return deleted
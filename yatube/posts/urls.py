@@ -28,5 +28,10 @@ urlpatterns = [
         name='profile_unfollow'
     ),
     path('like/', views.like_post, name='like_post'),
+    path(
+        'posts/<int:post_id>/like/',
+        views.like_post_json,
+        name='like_post_json'
+    ),
     path('liked_post/', views.users_liked_post, name='users_liked_post'),
 ]
@@ -1,60 +1,116 @@
+from http import HTTPStatus
+
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db.models import F
+from django.http import Http404, JsonResponse
 from django.shortcuts import (get_object_or_404, redirect,
                               render)
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
+
+from core.budgets import query_budget
+from core.pagecache import (is_shared_render, page_cache, skip_page_cache,
+                            tag_page)
 
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow, Like, Comment
+from .counts import cached_count
+from .likes import mark_liked, toggle_like
+from .pagination import CursorPaginator, WindowPaginator
+from .pages import FEED_TAG, author_tag, comments_tag, group_tag, post_tag
+from .models import (PENDING, PUBLISHED, Group, Post, User, Follow,
+                     Comment)
+
+
+def paginator(posts, request, count=None):
+    if settings.PAGINATION_MODE == 'cursor' or 'cursor' in request.GET:
+        paginator = CursorPaginator(posts, settings.POSTS_PER_PAGE)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+    else:
+        paginator = WindowPaginator(posts, settings.POSTS_PER_PAGE, count)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    tag_page(request, *[post_tag(post.pk) for post in page_obj])
+    if not is_shared_render(request):
+        mark_liked(page_obj, request.user)
+    return page_obj
 
 
-def paginator(posts, request):
-    paginator = Paginator(posts, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+def send_to_moderation(request, obj):
+    """При отложенной модерации скрывает запись до проверки."""
+    if settings.ASYNC_MODERATION:
+        obj.status = PENDING
+        messages.info(request, 'Запись появится после проверки модератором')
 
 
-@cache_page(20)
+@query_budget(5)
+@page_cache
 def index(request):
-    posts = Post.objects.select_related('author', 'group')
+    tag_page(request, FEED_TAG)
+    posts = Post.objects.published().for_feed().select_related(
+        'author', 'group')
     context = {
-        'page_obj': paginator(posts, request),
+        'page_obj': paginator(
+            posts, request, lambda: cached_count('index', posts)
+        ),
     }
     return render(request, 'posts/index.html', context)
 
 
+@query_budget(6)
+@page_cache
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
+    tag_page(request, group_tag(group.pk))
+    posts = group.posts.published().for_feed().select_related('author')
     context = {
         'group': group,
         'posts': posts,
-        'page_obj': paginator(posts, request),
+        'page_obj': paginator(
+            posts, request, lambda: cached_count(f'group:{group.pk}', posts)
+        ),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@query_budget(7)
+@page_cache
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('group')
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    tag_page(request, author_tag(author.pk))
+    posts = author.posts.published().for_feed().select_related('group')
     following = (request.user.is_authenticated
+                 and not is_shared_render(request)
                  and author.following.filter(user=request.user).exists())
     context = {
         'author': author,
-        'page_obj': paginator(posts, request),
+        'page_obj': paginator(
+            posts, request, lambda: cached_count(f'author:{author.pk}', posts)
+        ),
         'following': following
     }
     return render(request, 'posts/profile.html', context)
 
 
+@query_budget(5)
+@page_cache
 def post_detail(request, post_id):
     post = get_object_or_404(
-        Post.objects.select_related('author', 'group'), pk=post_id
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
     )
+    if post.status != PUBLISHED:
+        if request.user != post.author:
+            raise Http404
+        skip_page_cache(request)
+    tag_page(request, post_tag(post.pk), comments_tag(post.pk),
+             author_tag(post.author_id))
+    if post.group_id is not None:
+        tag_page(request, group_tag(post.group_id))
+    if not is_shared_render(request):
+        mark_liked([post], request.user)
     form = CommentForm()
-    comments = post.comments.all()
+    comments = post.comments.published().select_related('author')
     context = {
         'post': post,
         'form': form,
@@ -63,6 +119,7 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(3)
 @login_required
 def post_create(request):
     username = request.user
@@ -73,12 +130,14 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = username
+        send_to_moderation(request, post)
         post.save()
         return redirect('posts:profile', username=username)
     return render(request, 'posts/create_post.html', {'form': form})
 
 
 #  Удаление постов
+@query_budget(4)
 @login_required
 def post_delete(request, post_id):
     user = request.user
@@ -87,8 +146,10 @@ def post_delete(request, post_id):
         post.delete()
         return redirect('posts:profile', user.username)
         # return redirect('posts:index')
+    return redirect('posts:post_detail', post_id)
 
 
+@query_budget(4)
 @login_required
 def post_edit(request, post_id):
     username = request.user
@@ -101,7 +162,10 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        if {'title', 'text'} & set(form.changed_data):
+            send_to_moderation(request, post)
+        post.save()
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -111,6 +175,7 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(3)
 @login_required
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
@@ -119,6 +184,7 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        send_to_moderation(request, comment)
         comment.save()
         return redirect('posts:post_detail', post_id=post_id)
     else:
@@ -129,24 +195,33 @@ def add_comment(request, post_id):
         return redirect('posts:post_detail', post_id=post_id)
 
 
+@query_budget(6)
 @login_required
 def delete_comment(request, pk):
     comment = get_object_or_404(Comment, pk=pk)
     if request.user == comment.author:
-        Comment.objects.get(pk=pk).delete()
-        return redirect('posts:post_detail', comment.post_id)
+        comment.delete()
+    return redirect('posts:post_detail', comment.post_id)
 
 
+@query_budget(5)
 @login_required
 def follow_index(request):
-    posts = Post.objects.select_related('author', 'group').filter(
-        author__following__user=request.user)
+    user = request.user
+    # F() вместо '-timeline__post': строка подтянула бы сортировку
+    # Post по умолчанию лишним JOIN и сломала порядок индекса ленты.
+    posts = Post.objects.published().for_feed().select_related(
+        'author', 'group').filter(timeline__user=user).order_by(
+        '-timeline__pub_date', F('timeline__post').desc())
     context = {
-        'page_obj': paginator(posts, request),
+        'page_obj': paginator(
+            posts, request, lambda: cached_count(f'follow:{user.pk}', posts)
+        ),
     }
     return render(request, 'posts/follow.html', context)
 
 
+@query_budget(4)
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -157,6 +232,7 @@ def profile_follow(request, username):
     return redirect('posts:index')
 
 
+@query_budget(8)
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
@@ -165,36 +241,45 @@ def profile_unfollow(request, username):
     return redirect('posts:profile', username=username)
 
 
+@query_budget(3)
 @login_required
 def like_post(request):
-    user = request.user
-    post_id = request.POST.get('post_id')
-    post = get_object_or_404(Post, pk=post_id)
-    if request.method == 'POST':
-        post_id = request.POST.get('post_id')
-        post_obj = Post.objects.get(id=post_id)
-
-        if user != post.author:
-            if user in post_obj.liked.all():
-                post_obj.liked.remove(user)
-            else:
-                post_obj.liked.add(user)
-
-            like, created = Like.objects.get_or_create(user=user, post_id=post_id)
-            if not created:
-                if like.value == 'Нравится':
-                    like.value = 'Не нравится'
-                else:
-                    like.value = 'Нравится'
-            like.save()
-        return redirect('posts:index')
+    post = get_object_or_404(
+        Post.objects.only('author_id'), pk=request.POST.get('post_id')
+    )
+    if request.method == 'POST' and request.user.pk != post.author_id:
+        toggle_like(request.user.pk, post.pk)
+    return redirect('posts:index')
+
+
+@query_budget(9)
+@login_required
+@require_POST
+def like_post_json(request, post_id):
+    """Ставит или снимает лайк и отвечает новым состоянием в JSON."""
+    post = get_object_or_404(Post.objects.only('author_id'), pk=post_id)
+    if request.user.pk == post.author_id:
+        return JsonResponse(
+            {'error': 'Нельзя лайкнуть свой пост'}, status=HTTPStatus.FORBIDDEN
+        )
+    liked = toggle_like(request.user.pk, post.pk)
+    likes_count = Post.objects.values_list('likes_count', flat=True).get(
+        pk=post.pk
+    )
+    return JsonResponse({'liked': liked, 'likes_count': likes_count})
 
 
+@query_budget(5)
 @login_required
 def users_liked_post(request):
     user = request.user
-    posts = User.objects.prefetch_related('liked_by').get(pk=user.pk).liked_by.all()
+    # Свежие лайки первыми: порядок берется из индекса (user, -created).
+    posts = Post.objects.published().for_feed().select_related(
+        'author', 'group').filter(liking__user=user).order_by(
+        '-liking__created', '-liking__id')
     context = {
-        'page_obj': paginator(posts, request),
+        'page_obj': paginator(
+            posts, request, lambda: cached_count(f'liked:{user.pk}', posts)
+        ),
     }
     return render(request, 'posts/liked_post.html', context)
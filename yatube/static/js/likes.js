@@ -0,0 +1,37 @@
+// Лайки без перезагрузки страницы. Без JS форма отправляется как обычно.
+(function () {
+  'use strict';
+
+  function render(form, data) {
+    var button = form.querySelector('button');
+    button.classList.toggle('btn-dark', data.liked);
+    button.classList.toggle('btn-outline-white', !data.liked);
+    button.textContent = (data.liked ? '🤍 ' : '🖤 ') + data.likes_count;
+  }
+
+  document.addEventListener('submit', function (event) {
+    var form = event.target;
+    if (!form.matches('form[data-like-url]') || !window.fetch) {
+      return;
+    }
+    event.preventDefault();
+    fetch(form.dataset.likeUrl, {
+      method: 'POST',
+      body: new FormData(form),
+      credentials: 'same-origin',
+      headers: {'Accept': 'application/json'}
+    })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        return response.json();
+      })
+      .then(function (data) {
+        render(form, data);
+      })
+      .catch(function () {
+        form.submit();
+      });
+  });
+})();
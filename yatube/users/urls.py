@@ -10,6 +10,8 @@ from django.contrib.auth.views import (
 )
 from django.urls import path
 
+from core.budgets import query_budget
+
 from . import views
 
 app_name = 'users'
@@ -18,48 +20,62 @@ urlpatterns = [
     path('signup/', views.SignUp.as_view(), name='signup'),
     path(
         'logout/',
-        LogoutView.as_view(template_name='users/logged_out.html'),
+        query_budget(4)(
+            LogoutView.as_view(template_name='users/logged_out.html')
+        ),
         name='logout'
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        query_budget(2)(LoginView.as_view(template_name='users/login.html')),
         name='login'
     ),
     path(
         'password_reset/',
-        PasswordResetView.as_view(
-            template_name='users/password_reset_form.html'),
+        query_budget(2)(
+            PasswordResetView.as_view(
+                template_name='users/password_reset_form.html')
+        ),
         name='password_reset',
     ),
     path(
         'password_change/',
-        PasswordChangeView.as_view(
-            template_name='users/password_change_form.html'),
+        query_budget(2)(
+            PasswordChangeView.as_view(
+                template_name='users/password_change_form.html')
+        ),
         name='password_change',
     ),
     path(
         'password_change/done/',
-        PasswordChangeDoneView.as_view(
-            template_name='users/password_change_done.html'),
+        query_budget(2)(
+            PasswordChangeDoneView.as_view(
+                template_name='users/password_change_done.html')
+        ),
         name='password_change_done',
     ),
     path(
         'reset/<uidb64>/<token>/',
-        PasswordResetConfirmView.as_view(
-            template_name='users/password_reset_confirm.html'),
+        query_budget(5)(
+            PasswordResetConfirmView.as_view(
+                template_name='users/password_reset_confirm.html')
+        ),
         name='password_reset_confirm',
     ),
     path(
         'password_reset/done/',
-        PasswordResetDoneView.as_view(
-            template_name='users/password_reset_done.html'),
+        query_budget(2)(
+            PasswordResetDoneView.as_view(
+                template_name='users/password_reset_done.html')
+        ),
         name='password_reset_done',
     ),
     path(
         'reset/done/',
-        PasswordResetCompleteView.as_view(
-            template_name='users/password_reset_complete.html'),
+        query_budget(2)(
+            PasswordResetCompleteView.as_view(
+                template_name='users/password_reset_complete.html')
+        ),
         name='password_reset_complete',
     ),
 ]
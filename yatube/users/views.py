@@ -8,6 +8,7 @@ from .forms import CreationForm
 
 
 class SignUp(CreateView):
+    query_budget = 2
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
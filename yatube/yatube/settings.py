@@ -28,10 +28,10 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,10 +39,49 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
 
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+# debug_toolbar только для разработки: в бою его заменяют
+# метрики RequestMetricsMiddleware.
+if DEBUG:
+    INSTALLED_APPS += ['debug_toolbar']
+    MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
+# Метрики запросов: медленные пишутся в лог всегда, остальные - выборочно
+REQUEST_METRICS_SAMPLE_RATE = float(
+    os.getenv('REQUEST_METRICS_SAMPLE_RATE', '0.01'))
+REQUEST_METRICS_SLOW_MS = int(os.getenv('REQUEST_METRICS_SLOW_MS', '500'))
+REQUEST_METRICS_HEADER = os.getenv('REQUEST_METRICS_HEADER', 'False') == 'True'
+
+# Каталог, через который воркеры складывают метрики для /metrics.
+# Без него /metrics показывает только принявший запрос процесс.
+METRICS_DIR = os.getenv('METRICS_DIR')
+# Адреса, которым /metrics отвечает напрямую, минуя прокси; пустой
+# список закрывает /metrics для всех
+METRICS_ALLOWED_IPS = [
+    ip for ip in os.getenv('METRICS_ALLOWED_IPS', '').split(', ') if ip
 ]
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'yatube.pagecache': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -66,6 +105,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+TEST_RUNNER = 'core.testing.TestRunner'
+
 
 DATABASES = {
     'default': {
@@ -74,11 +115,20 @@ DATABASES = {
     }
 }
 
+# Файл кэша, общего для всех воркеров сервера. Через него процессы
+# видят сбросы кэша друг друга; тесты берут кэш в памяти из
+# yatube.test_settings (core.testing.TestRunner для manage.py test)
+CACHE_PATH = os.getenv('CACHE_PATH', os.path.join(BASE_DIR, 'cache.sqlite3'))
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': CACHE_PATH,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
     }
 }
+# Предельный срок, с, для сбрасываемых при изменениях значений, если
+# кэш свой у каждого процесса (core.cache.shared_timeout)
+LOCAL_CACHE_TIMEOUT = 20
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -116,6 +166,30 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 POSTS_PER_PAGE = 10
+# Предельное время жизни общей для всех пользователей копии страницы
+# ленты, с: раньше ее сбрасывают изменения показанных на ней данных.
+# До этого срока копия еще отдается, если база не отвечает
+PAGE_CACHE_TIMEOUT = 60 * 60 * 6
+# Копия старше этого срока, с, отдается сразу и пересобирается после ответа.
+# Оба срока действуют, только если кэш общий, иначе - LOCAL_CACHE_TIMEOUT
+PAGE_CACHE_SOFT_TIMEOUT = 60 * 5
+# Сколько секунд ждать значение, которое собирает другой процесс, и
+# через сколько секунд блокировка сборки снимается сама
+SINGLE_FLIGHT_WAIT = 2
+SINGLE_FLIGHT_LOCK_TIMEOUT = 30
+# После изменения списка выполните команду render_markdown
+MARKDOWN_EXTENSIONS = ['markdown.extensions.fenced_code']
+# Длина отрывка поста в ленте, в символах текста
+POST_EXCERPT_LENGTH = 600
+# Сколько последних постов хранится в ленте подписок пользователя
+TIMELINE_LENGTH = 500
+TIMELINE_BATCH_SIZE = 1000
+# numbered - номера страниц (COUNT и OFFSET), cursor - по ключу (pub_date, id)
+PAGINATION_MODE = os.getenv('PAGINATION_MODE', 'numbered')
+# Посты и комментарии сохраняются сразу со статусом "на модерации",
+# а фильтр запрещенных слов запускает команда moderate.
+ASYNC_MODERATION = os.getenv('ASYNC_MODERATION', 'False') == 'True'
+MODERATION_INTERVAL = 2
 TEXT_CROP = 15
 TEST_ID = 1
 LOGIN_REDIRECT_URL = 'posts:index'
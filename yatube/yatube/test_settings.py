@@ -0,0 +1,8 @@
+"""Настройки для тестов: свой кэш в памяти вместо общего файла сервера."""
+from .settings import *  # noqa: F401, F403
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}